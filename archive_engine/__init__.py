@@ -0,0 +1,3 @@
+def run_archive(payload=None):
+    from archive_engine.archive_logs import main as archive_main
+    return archive_main(payload)
@@ -0,0 +1,295 @@
+"""
+Columnar Parquet archive for normalized_logs.
+
+Logs older than LOG_ARCHIVE_AFTER_DAYS are moved out of Mongo into Parquet
+files partitioned by day and source (hive layout):
+
+    <LOG_ARCHIVE_DIR>/day=2025-02-20/src=syslog_raw.txt/part-<run>-<n>.parquet
+
+_state.json in the archive root records the watermark: every log with a
+timestamp before it lives in the archive, everything after it in Mongo.
+A run saves the new watermark before it deletes anything from Mongo, so
+archived rows stay visible even if the run dies halfway. A run that finds
+the previous one unfinished marks the archive as possibly holding
+duplicate rows; query_archive() then counts and returns each _id once.
+query_archive() scans the archive with Arrow dataset filters, so day
+partitions outside the requested range are never opened and column
+predicates are pushed down to the Parquet reader.
+
+pyarrow is optional; without it archiving is unavailable and queries only
+see Mongo.
+"""
+
+import json
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARCHIVE_DIR = os.environ.get(
+    "LOG_ARCHIVE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "archive", "normalized_logs")),
+)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("LOG_ARCHIVE_AFTER_DAYS", "30"))
+ROWS_PER_FILE = int(os.environ.get("LOG_ARCHIVE_ROWS_PER_FILE", "100000"))
+# Rows removed from Mongo per delete_many() once their file is written
+DELETE_CHUNK = 1000
+STATE_FILE = "_state.json"
+
+STRING_FIELDS = ("_id", "host", "os", "software", "version", "event_type",
+                 "message", "source", "severity", "user", "cpe")
+
+if pa is not None:
+    SCHEMA = pa.schema(
+        [("_id", pa.string()), ("timestamp", pa.timestamp("us"))]
+        + [(f, pa.string()) for f in STRING_FIELDS[1:]]
+    )
+    PARTITIONING = ds.partitioning(pa.schema([("day", pa.string()), ("src", pa.string())]), flavor="hive")
+
+
+def available():
+    return pa is not None
+
+
+# ------------------------------------------------------------
+# WATERMARK
+# ------------------------------------------------------------
+def load_state(archive_dir=ARCHIVE_DIR):
+    path = os.path.join(archive_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_watermark(archive_dir=ARCHIVE_DIR):
+    """Return the archive watermark (datetime) or None if nothing is archived."""
+    wm = load_state(archive_dir).get("watermark")
+    return datetime.fromisoformat(wm) if wm else None
+
+
+def _save_state(archive_dir, state):
+    path = os.path.join(archive_dir, STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def clear_archive(archive_dir=ARCHIVE_DIR):
+    """
+    Delete the archived partitions and the watermark, e.g. when the log
+    collection is reset. Only day=* directories and _state.json are removed;
+    anything else under archive_dir is left alone. Returns the number of
+    day partitions deleted.
+    """
+    if not os.path.isdir(archive_dir):
+        return 0
+    # Watermark first: once it is gone, queries stop reading the archive
+    for name in (STATE_FILE, STATE_FILE + ".tmp"):
+        path = os.path.join(archive_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    removed = 0
+    for name in os.listdir(archive_dir):
+        path = os.path.join(archive_dir, name)
+        if name.startswith("day=") and os.path.isdir(path):
+            shutil.rmtree(path)
+            removed += 1
+    return removed
+
+
+# ------------------------------------------------------------
+# WRITING
+# ------------------------------------------------------------
+def _partition_value(value):
+    """Make a source name safe to use as a directory name."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", str(value or "unknown")) or "unknown"
+
+
+def _to_row(doc):
+    row = {f: (None if doc.get(f) is None else str(doc.get(f))) for f in STRING_FIELDS}
+    row["timestamp"] = doc["timestamp"]
+    return row
+
+
+def _write_partition(archive_dir, day, src, rows, run_id, seq):
+    part_dir = os.path.join(archive_dir, f"day={day}", f"src={src}")
+    os.makedirs(part_dir, exist_ok=True)
+    path = os.path.join(part_dir, f"part-{run_id}-{seq:05d}.parquet")
+    table = pa.Table.from_pylist(rows, schema=SCHEMA)
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    return path
+
+
+def archive_logs(collection, cutoff, archive_dir=ARCHIVE_DIR, rows_per_file=ROWS_PER_FILE):
+    """
+    Move every log with timestamp < cutoff from `collection` into Parquet.
+    A partition buffer is written once it reaches `rows_per_file` rows (and at
+    the end); its documents are deleted from Mongo only after the file is in
+    place, so a crash can duplicate rows in the archive but never lose them.
+    The watermark is saved before the first delete, so queries read what is
+    already archived while the run is still going or after it crashed.
+    Returns {"archived", "files", "deleted", "watermark"}.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for the Parquet archive")
+
+    os.makedirs(archive_dir, exist_ok=True)
+    run_id = uuid.uuid4().hex[:12]
+
+    state = load_state(archive_dir)
+    if state.get("running"):
+        # The previous run died between writing files and deleting their
+        # rows; this run archives those rows again
+        state["duplicates"] = True
+    old = state.get("watermark")
+    watermark = max(cutoff, datetime.fromisoformat(old)) if old else cutoff
+    state.update({"watermark": watermark.isoformat(), "running": run_id,
+                  "updated_at": datetime.utcnow().isoformat()})
+    _save_state(archive_dir, state)
+    buffers = {}
+    stats = {"archived": 0, "files": 0, "deleted": 0}
+
+    def flush(key):
+        rows = buffers.pop(key)
+        _write_partition(archive_dir, key[0], key[1], rows, run_id, stats["files"])
+        stats["files"] += 1
+        stats["archived"] += len(rows)
+        ids = [r["_id_raw"] for r in rows]
+        for i in range(0, len(ids), DELETE_CHUNK):
+            res = collection.delete_many({"_id": {"$in": ids[i:i + DELETE_CHUNK]}})
+            stats["deleted"] += getattr(res, "deleted_count", 0) or 0
+
+    # Only real datetimes: unparsable string timestamps stay in Mongo
+    cursor = collection.find({"timestamp": {"$lt": cutoff}}, batch_size=5000)
+    for doc in cursor:
+        ts = doc.get("timestamp")
+        if not isinstance(ts, datetime):
+            continue
+        key = (ts.strftime("%Y-%m-%d"), _partition_value(doc.get("source")))
+        row = _to_row(doc)
+        row["_id_raw"] = doc["_id"]
+        buf = buffers.setdefault(key, [])
+        buf.append(row)
+        if len(buf) >= rows_per_file:
+            flush(key)
+
+    for key in list(buffers):
+        flush(key)
+
+    state.pop("running", None)
+    state.update({
+        "rows": state.get("rows", 0) + stats["archived"],
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+    _save_state(archive_dir, state)
+    stats["watermark"] = state["watermark"]
+    return stats
+
+
+# ------------------------------------------------------------
+# QUERYING
+# ------------------------------------------------------------
+def _and(expr, other):
+    return other if expr is None else expr & other
+
+
+def _regex(field, pattern):
+    return pc.match_substring_regex(ds.field(field), pattern=pattern, ignore_case=True)
+
+
+def build_filter(host=None, software=None, event_type=None, severity=None, q=None, start=None, end=None):
+    """Arrow filter expression equivalent to log_service.build_query()."""
+    expr = None
+    if start:
+        expr = _and(expr, ds.field("day") >= start.strftime("%Y-%m-%d"))
+        expr = _and(expr, ds.field("timestamp") >= pa.scalar(start, pa.timestamp("us")))
+    if end:
+        expr = _and(expr, ds.field("day") <= end.strftime("%Y-%m-%d"))
+        expr = _and(expr, ds.field("timestamp") <= pa.scalar(end, pa.timestamp("us")))
+    if host:
+        expr = _and(expr, ds.field("host") == host)
+    if event_type:
+        expr = _and(expr, ds.field("event_type") == event_type)
+    if software:
+        expr = _and(expr, _regex("software", software))
+    if severity:
+        expr = _and(expr, _regex("severity", severity))
+    if q:
+        expr = _and(expr, _regex("message", q) | _regex("software", q) | _regex("host", q))
+    return expr
+
+
+def _open_dataset(archive_dir):
+    if pa is None or not os.path.isdir(archive_dir):
+        return None
+    return ds.dataset(archive_dir, format="parquet", partitioning=PARTITIONING)
+
+
+def _drop_duplicate_ids(table):
+    seen = set()
+    keep = []
+    for i, _id in enumerate(table.column("_id").to_pylist()):
+        if _id not in seen:
+            seen.add(_id)
+            keep.append(i)
+    return table if len(keep) == table.num_rows else table.take(keep)
+
+
+def query_archive(host=None, software=None, event_type=None, severity=None, q=None,
+                  start=None, end=None, limit=50, sort_field="timestamp", sort_dir=-1,
+                  archive_dir=ARCHIVE_DIR):
+    """
+    Return (total, docs): the number of archived logs matching the filters and
+    the first `limit` of them in sort order. Batches are reduced to their own
+    top `limit` rows as they stream in, so memory stays bounded. When a
+    crashed run may have left duplicate rows, each _id is counted and
+    returned once (the count then reads the _id column).
+    """
+    dataset = _open_dataset(archive_dir)
+    if dataset is None:
+        return 0, []
+    expr = build_filter(host, software, event_type, severity, q, start, end)
+    dedup = bool(load_state(archive_dir).get("duplicates"))
+    if dedup:
+        ids = dataset.to_table(columns=["_id"], filter=expr).column("_id")
+        total = pc.count_distinct(ids).as_py()
+    else:
+        total = dataset.count_rows(filter=expr)
+    if total == 0 or limit <= 0:
+        return total, []
+
+    if sort_field not in SCHEMA.names:
+        sort_field = "timestamp"
+    keys = [(sort_field, "descending" if sort_dir < 0 else "ascending")]
+    columns = list(SCHEMA.names)
+    best = None
+    for batch in dataset.to_batches(columns=columns, filter=expr):
+        if batch.num_rows == 0:
+            continue
+        table = pa.Table.from_batches([batch])
+        if best is not None:
+            table = pa.concat_tables([best, table])
+        if dedup:
+            table = _drop_duplicate_ids(table)
+        idx = pc.select_k_unstable(table, k=min(limit, table.num_rows), sort_keys=keys)
+        best = table.take(idx)
+    if best is None:
+        return total, []
+    best = best.sort_by(keys)
+    return total, [{k: v for k, v in row.items() if v is not None} for row in best.to_pylist()]
@@ -16,3 +16,4 @@ COL_CVES = db["cve_database"]
 COL_ALERTS = db["alerts"]
 COL_MATCHES = db["vuln_matches"]
 COL_SYNC_LOGS = db.get_collection("sync_logs")
+COL_LOG_BUCKETS = db["log_buckets"]
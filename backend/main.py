@@ -1,4 +1,6 @@
 # backend/main.py
+import os
+import sys
 from fastapi import FastAPI
 from backend.routes import run, scripts
 from fastapi.middleware.cors import CORSMiddleware
@@ -26,9 +28,10 @@ app.include_router(stats.router)
 app.include_router(run.router)
 app.include_router(jobs.router)
 app.include_router(scripts.router)
-from backend.routes import reports, matches
+from backend.routes import reports, matches, ingest
 app.include_router(reports.router)
 app.include_router(matches.router)
+app.include_router(ingest.router)
 
 @app.on_event("startup")
 def _startup():
@@ -38,6 +41,23 @@ def _startup():
     except Exception:
         pass
 
+    # Build missing indexes in the background (see services/index_service.py)
+    try:
+        from backend.services.index_service import INDEX_BOOTSTRAP, start_background_bootstrap
+        if INDEX_BOOTSTRAP:
+            from backend.db import db
+            start_background_bootstrap(db)
+    except Exception as e:
+        print(f"[WARN] Index bootstrap not started: {e}")
+
+    # Optional syslog receiver (UDP/TCP) feeding normalized_logs
+    if os.environ.get("SYSLOG_LISTENER", "0") == "1":
+        try:
+            from parser_engine.syslog_listener import start_in_thread
+            app.state.syslog_listener = start_in_thread()
+        except Exception as e:
+            print(f"[WARN] Syslog listener failed to start: {e}")
+
     # Run diagnostics on startup in a separate thread
     # DISABLED to prevent data wiping/re-ingestion loop on every reload
     import threading
@@ -80,6 +100,16 @@ def _shutdown():
         _scheduler.shutdown()
     except Exception:
         pass
+    listener = getattr(app.state, "syslog_listener", None)
+    if listener is not None:
+        try:
+            listener.stop_threadsafe()
+        except Exception:
+            pass
+    # Keep the duplicate filter built up by HTTP/syslog pushes
+    pipeline = sys.modules.get("parser_engine.insert_to_mongo")
+    if pipeline is not None:
+        pipeline.save_dedup(force=True)
 
 @app.get("/health")
 def health():
@@ -0,0 +1,171 @@
+# backend/routes/ingest.py
+import asyncio
+import json
+import os
+import zlib
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+INGEST_HTTP_BATCH = int(os.environ.get("INGEST_HTTP_BATCH", "1000"))
+# Longest accepted NDJSON line; longer lines are rejected, not buffered
+INGEST_HTTP_MAX_LINE = int(os.environ.get("INGEST_HTTP_MAX_LINE", str(1024 * 1024)))
+# Cap on the decompressed size of a gzip body (guards against gzip bombs)
+INGEST_HTTP_MAX_BODY = int(os.environ.get("INGEST_HTTP_MAX_BODY", str(1024 * 1024 * 1024)))
+# Largest piece inflated from a gzip body in one step
+GUNZIP_PIECE = 1024 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class _Gunzip:
+    """
+    Incremental gzip decoder that also handles concatenated members.
+    Output comes in pieces of at most GUNZIP_PIECE bytes, so a small chunk
+    of a gzip bomb never inflates all at once; BodyTooLarge is raised once
+    the total passes max_output.
+    """
+    def __init__(self, max_output=INGEST_HTTP_MAX_BODY):
+        self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.max_output = max_output
+        self.total = 0
+
+    def _count(self, piece):
+        self.total += len(piece)
+        if self.total > self.max_output:
+            raise BodyTooLarge(f"decompressed body exceeds {self.max_output} bytes")
+        return piece
+
+    def feed(self, data):
+        """Yield the decompressed pieces of one input chunk."""
+        while True:
+            piece = self._count(self._d.decompress(data, GUNZIP_PIECE))
+            if piece:
+                yield piece
+            if self._d.eof:
+                data = self._d.unused_data
+                if not data:
+                    return
+                self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                continue
+            data = self._d.unconsumed_tail
+            # A full piece may leave more output buffered inside zlib
+            if not data and len(piece) < GUNZIP_PIECE:
+                return
+
+    def flush(self):
+        return self._count(self._d.flush())
+
+
+def _parse_line(line, source):
+    """Return (item, None) or (None, exception)."""
+    try:
+        item = json.loads(line)
+    except ValueError as e:
+        return None, e
+    if not isinstance(item, dict):
+        return None, TypeError(f"expected a JSON object, got {type(item).__name__}")
+    item.setdefault("source", source)
+    return item, None
+
+
+@router.post("", summary="Stream NDJSON logs (optionally gzip) into normalized_logs")
+async def ingest_ndjson(
+    request: Request,
+    source: str = Query("http_ingest", description="Source name for records without one"),
+    batch_size: int = Query(INGEST_HTTP_BATCH, ge=1, le=50000),
+):
+    """
+    Body: one JSON object per line, sent chunked or in one piece. Set
+    `Content-Encoding: gzip` for a gzip body. Lines are parsed as they arrive
+    and inserted in batches; the next batch is parsed while the previous one
+    is being written.
+    """
+    try:
+        from parser_engine.insert_to_mongo import ingest_items, default_make_id, get_dead_letter
+        from parser_engine.dead_letter import DEAD_LETTER_ENABLED
+    except Exception as e:
+        raise HTTPException(500, f"Ingestion pipeline not available: {e}")
+
+    gunzip = _Gunzip() if "gzip" in request.headers.get("content-encoding", "").lower() else None
+    totals = {"accepted": 0, "rejected": 0, "dead_lettered": 0, "duplicates": 0, "errors": 0}
+    sink = get_dead_letter() if DEAD_LETTER_ENABLED else None
+    batch = []
+    pending = None
+    buf = b""
+    skipping = False  # inside an over-long line
+
+    def _count(res):
+        totals["accepted"] += res["inserted"]
+        totals["duplicates"] += res["duplicates"]
+        totals["rejected"] += res["rejected"]
+        totals["dead_lettered"] += res.get("dead_lettered", 0)
+        totals["errors"] += res["errors"]
+
+    def _reject(raw, exc):
+        # Same dead-letter file and stage as unparseable lines in file ingest
+        totals["rejected"] += 1
+        if sink is not None and sink.offer(raw, source, exc, "parse"):
+            totals["dead_lettered"] += 1
+
+    async def _submit(items):
+        nonlocal pending
+        if pending is not None:
+            _count(await pending)
+        pending = asyncio.ensure_future(run_in_threadpool(ingest_items, items, default_make_id))
+
+    def _take(line):
+        line = line.strip()
+        if not line:
+            return
+        item, exc = _parse_line(line, source)
+        if item is None:
+            _reject(line, exc)
+        else:
+            batch.append((line, item))
+
+    try:
+        async for chunk in request.stream():
+            pieces = [chunk] if gunzip is None else gunzip.feed(chunk)
+            try:
+                for piece in pieces:
+                    buf += piece
+                    lines = buf.split(b"\n")
+                    buf = lines.pop()
+                    for line in lines:
+                        if skipping:
+                            skipping = False
+                            continue
+                        _take(line)
+                    if skipping:
+                        buf = b""  # still no newline: keep discarding
+                    elif len(buf) > INGEST_HTTP_MAX_LINE:
+                        _reject(buf, ValueError(f"line longer than {INGEST_HTTP_MAX_LINE} bytes"))
+                        buf = b""
+                        skipping = True
+                    if len(batch) >= batch_size:
+                        await _submit(batch)
+                        batch = []
+            except zlib.error:
+                raise HTTPException(400, "Invalid gzip body")
+            except BodyTooLarge as e:
+                raise HTTPException(413, str(e))
+
+        if gunzip is not None:
+            try:
+                buf += gunzip.flush()
+            except BodyTooLarge as e:
+                raise HTTPException(413, str(e))
+        if buf and not skipping:
+            for line in buf.split(b"\n"):
+                _take(line)
+        if batch:
+            await _submit(batch)
+    finally:
+        if pending is not None:
+            _count(await pending)
+
+    return totals
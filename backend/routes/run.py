@@ -23,6 +23,10 @@ try:
     from reports import run_reports
 except Exception:
     run_reports = None
+try:
+    from archive_engine import run_archive
+except Exception:
+    run_archive = None
 
 @router.post("/parser")
 def start_parser(payload: Dict = None):
@@ -52,6 +56,13 @@ def start_reports(payload: Dict = None):
     tid = create_and_start("reports", run_reports, payload or {})
     return {"task_id": tid, "status": "started"}
 
+@router.post("/archive")
+def start_archive(payload: Dict = None):
+    if not run_archive:
+        raise HTTPException(500, "Archive function not available")
+    tid = create_and_start("archive", run_archive, payload or {})
+    return {"task_id": tid, "status": "started"}
+
 @router.get("/status/{task_id}")
 def task_status(task_id: str):
     task = get_task(task_id)
@@ -1,9 +1,15 @@
 # backend/routes/stats.py
 from fastapi import APIRouter, Query
 from ..services.stats_service import get_stats
+from ..services.index_service import index_report
+from ..db import db
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 @router.get("/", summary="Aggregate stats")
 def api_stats(limit_hosts: int = Query(20), limit_cves: int = Query(20)):
     return get_stats(limit_hosts=limit_hosts, limit_cves=limit_cves)
+
+@router.get("/indexes", summary="Declared vs. actual indexes, usage and sampled query plans")
+def api_index_report(sample: bool = Query(True, description="Run explain() on the sampled hot queries")):
+    return index_report(db, sample=sample)
@@ -27,12 +27,17 @@ try:
     from reports import run_reports
 except Exception:
     run_reports = None
+try:
+    from archive_engine import run_archive
+except Exception:
+    run_archive = None
 
 _AVAILABLE = {
     "parser": run_parser,
     "matching": run_matching,
     "alerts": run_alerts,
     "reports": run_reports,
+    "archive": run_archive,
 }
 
 
@@ -0,0 +1,216 @@
+# backend/services/index_service.py
+"""
+Index manager for every collection the backend and engines query.
+
+REQUIRED_INDEXES declares the indexes each collection needs. ensure_indexes()
+builds the missing ones (run in a background thread at API startup) and
+index_report() checks what is actually there:
+  - missing : declared indexes with no equivalent on the server
+  - unused  : indexes with zero accesses in $indexStats since the server
+              started (the _id index is never reported)
+  - plans   : explain() of the representative queries in SAMPLE_QUERIES,
+              flagging any that still fall back to a collection scan
+"""
+import os
+import threading
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+INDEX_BOOTSTRAP = os.environ.get("INDEX_BOOTSTRAP", "1") == "1"
+
+REQUIRED_INDEXES = {
+    "normalized_logs": [
+        # find_logs sorts by -timestamp; the alert engine sorts and limits by it
+        {"keys": [("timestamp", DESCENDING)], "name": "timestamp_desc"},
+        {"keys": [("host", ASCENDING), ("timestamp", DESCENDING)], "name": "host_timestamp"},
+        {"keys": [("source", ASCENDING), ("timestamp", DESCENDING)], "name": "source_timestamp"},
+        {"keys": [("software", ASCENDING), ("version", ASCENDING)], "name": "software_version"},
+    ],
+    "alerts": [
+        {"keys": [("alert_generated_at", DESCENDING)], "name": "alert_generated_at_desc"},
+        {"keys": [("host", ASCENDING), ("alert_generated_at", DESCENDING)], "name": "host_alert_generated_at"},
+        {"keys": [("severity", ASCENDING)], "name": "severity"},
+        {"keys": [("exported", ASCENDING)], "name": "exported"},
+    ],
+    "cve_database": [
+        {"keys": [("cve_id", ASCENDING)], "name": "cve_id"},
+        {"keys": [("product", ASCENDING)], "name": "product"},
+        {"keys": [("vendor", ASCENDING)], "name": "vendor"},
+        {"keys": [("cvss_score", DESCENDING)], "name": "cvss_score_desc"},
+    ],
+    "vuln_matches": [
+        {"keys": [("log_id", ASCENDING)], "name": "log_id"},
+        {"keys": [("cve_id", ASCENDING)], "name": "cve_id"},
+        {"keys": [("severity", ASCENDING)], "name": "severity"},
+        {"keys": [("host", ASCENDING)], "name": "host"},
+        {"keys": [("matched_at", DESCENDING)], "name": "matched_at_desc"},
+    ],
+}
+
+# (collection, filter, sort, limit): the hot queries of the API and engines
+SAMPLE_QUERIES = [
+    ("normalized_logs", {}, [("timestamp", DESCENDING)], 50),
+    ("normalized_logs", {"host": "__sample__"}, [("timestamp", DESCENDING)], 50),
+    ("normalized_logs", {"software": "__sample__", "version": "__sample__"}, None, 50),
+    ("alerts", {}, [("alert_generated_at", DESCENDING)], 50),
+    ("alerts", {"exported": {"$ne": True}}, None, 1000),
+    ("cve_database", {"cve_id": "__sample__"}, None, 1),
+    ("cve_database", {}, [("cvss_score", DESCENDING)], 50),
+    ("vuln_matches", {}, [("matched_at", DESCENDING)], 50),
+]
+
+_LAST_BOOTSTRAP = {}
+
+
+def _key_list(keys):
+    # Special index types ("text", "2dsphere", ...) keep their string value
+    return [(f, int(d) if isinstance(d, (int, float)) else d) for f, d in keys]
+
+
+def _equivalent(declared, existing):
+    """
+    Same fields in the same order, with the same or fully reversed directions
+    (a reversed index serves the same sorts).
+    """
+    a, b = _key_list(declared), _key_list(existing)
+    if [f for f, _ in a] != [f for f, _ in b]:
+        return False
+    dirs_a, dirs_b = [d for _, d in a], [d for _, d in b]
+    if dirs_a == dirs_b:
+        return True
+    return all(isinstance(d, int) for d in dirs_a + dirs_b) and dirs_a == [-d for d in dirs_b]
+
+
+def _find_equivalent(spec, index_info):
+    for name, info in index_info.items():
+        if _equivalent(spec["keys"], info["key"]):
+            return name
+    return None
+
+
+# ------------------------------------------------------------
+# BOOTSTRAP
+# ------------------------------------------------------------
+def ensure_indexes(db, specs=None):
+    """Create every declared index that has no equivalent yet."""
+    specs = specs or REQUIRED_INDEXES
+    report = {}
+    for col_name, col_specs in specs.items():
+        col = db[col_name]
+        entry = {"created": [], "existing": [], "failed": {}}
+        try:
+            info = col.index_information()
+        except PyMongoError as e:
+            entry["failed"]["*"] = str(e)
+            report[col_name] = entry
+            continue
+        for spec in col_specs:
+            existing = _find_equivalent(spec, info)
+            if existing:
+                entry["existing"].append(existing)
+                continue
+            try:
+                # background is ignored by MongoDB >= 4.2 (builds no longer block)
+                col.create_index(spec["keys"], name=spec["name"], background=True)
+                entry["created"].append(spec["name"])
+            except PyMongoError as e:
+                entry["failed"][spec["name"]] = str(e)
+        report[col_name] = entry
+    _LAST_BOOTSTRAP.clear()
+    _LAST_BOOTSTRAP.update({"finished_at": datetime.utcnow().isoformat(), "collections": report})
+    return report
+
+
+def start_background_bootstrap(db):
+    """Run ensure_indexes() off the startup path."""
+    def _run():
+        try:
+            report = ensure_indexes(db)
+            created = sum(len(r["created"]) for r in report.values())
+            failed = sum(len(r["failed"]) for r in report.values())
+            print(f"[STARTUP] Index bootstrap: {created} created, {failed} failed")
+        except Exception as e:
+            print(f"[STARTUP] Index bootstrap failed: {e}")
+
+    t = threading.Thread(target=_run, name="index-bootstrap", daemon=True)
+    t.start()
+    return t
+
+
+# ------------------------------------------------------------
+# VERIFICATION
+# ------------------------------------------------------------
+def _plan_stages(plan):
+    """Flatten the stage names of an explain() winningPlan tree."""
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        if node.get("indexName"):
+            stages.append(f"index:{node['indexName']}")
+        for key in ("inputStage", "queryPlan"):
+            if key in node:
+                stack.append(node[key])
+        stack.extend(node.get("inputStages", []))
+    return stages
+
+
+def explain_query(col, query, sort=None, limit=0):
+    cursor = col.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    plan = cursor.explain()
+    stages = _plan_stages(plan.get("queryPlanner", {}).get("winningPlan", {}))
+    stats = plan.get("executionStats", {})
+    return {
+        "stages": [s for s in stages if not s.startswith("index:")],
+        "indexes": [s[6:] for s in stages if s.startswith("index:")],
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+    }
+
+
+def index_report(db, sample=True):
+    """Declared vs. actual indexes, $indexStats usage and sampled query plans."""
+    report = {"generated_at": datetime.utcnow().isoformat(), "collections": {},
+              "bootstrap": dict(_LAST_BOOTSTRAP)}
+    for col_name, specs in REQUIRED_INDEXES.items():
+        col = db[col_name]
+        entry = {"indexes": [], "missing": [], "unused": [], "plans": []}
+        try:
+            info = col.index_information()
+            usage = {s["name"]: s for s in col.aggregate([{"$indexStats": {}}])}
+        except PyMongoError as e:
+            entry["error"] = str(e)
+            report["collections"][col_name] = entry
+            continue
+
+        for name, idx in info.items():
+            accesses = usage.get(name, {}).get("accesses", {})
+            ops = accesses.get("ops")
+            entry["indexes"].append({"name": name, "key": _key_list(idx["key"]), "ops": ops,
+                                     "since": accesses.get("since")})
+            if name != "_id_" and ops == 0:
+                entry["unused"].append(name)
+        entry["missing"] = [s["name"] for s in specs if not _find_equivalent(s, info)]
+
+        if sample:
+            for q_col, query, sort, limit in SAMPLE_QUERIES:
+                if q_col != col_name:
+                    continue
+                try:
+                    plan = explain_query(col, query, sort, limit)
+                except PyMongoError as e:
+                    plan = {"error": str(e)}
+                plan.update({"filter": list(query), "sort": sort and [f for f, _ in sort]})
+                entry["plans"].append(plan)
+        report["collections"][col_name] = entry
+    return report
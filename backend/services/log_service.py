@@ -1,7 +1,13 @@
 # backend/services/log_service.py
+import os
 from datetime import datetime
 from bson import ObjectId
-from ..db import COL_LOGS
+from ..db import COL_LOGS, COL_LOG_BUCKETS
+from archive_engine.parquet_archive import get_watermark, query_archive
+from parser_engine.storage import buckets_enabled, count_range
+
+# Set LOG_ARCHIVE_FANOUT=0 to query Mongo only
+ARCHIVE_FANOUT = os.environ.get("LOG_ARCHIVE_FANOUT", "1") == "1"
 
 def _to_output(doc):
     if not doc:
@@ -42,6 +48,34 @@ def build_query(host=None, software=None, event_type=None, severity=None, q=None
         query["timestamp"] = ts_query
     return query
 
+def _parse_dt(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+def _sort_key(field):
+    def key(doc):
+        v = doc.get(field)
+        if isinstance(v, datetime):
+            return (1, v.isoformat())
+        return (0, "") if v is None else (1, str(v))
+    return key
+
+def count_logs(query, start=None, end=None, floor=None):
+    """
+    Count matching logs without a full scan where possible: the unfiltered
+    count comes from collection metadata and pure time-range counts from the
+    day buckets (when the active storage mode is "buckets"). `floor` is the archive watermark.
+    """
+    if not query and floor is None:
+        return COL_LOGS.estimated_document_count()
+    if set(query) <= {"timestamp"} and buckets_enabled(COL_LOGS.database):
+        start = _parse_dt(start)
+        if floor is not None:
+            start = max(start, floor) if start else floor
+        return count_range(COL_LOGS, COL_LOG_BUCKETS, start, _parse_dt(end))
+    return COL_LOGS.count_documents(query)
+
 def find_logs(host=None, software=None, event_type=None, severity=None, q=None, start=None, end=None, limit=50, skip=0, sort="-timestamp"):
     query = build_query(host, software, event_type, severity, q, start, end)
     sort_field = "timestamp"
@@ -53,7 +87,30 @@ def find_logs(host=None, software=None, event_type=None, severity=None, q=None,
         else:
             sort_field = sort
             sort_dir = 1
-    cursor = COL_LOGS.find(query).sort(sort_field, sort_dir).skip(skip).limit(limit)
-    items = [_to_output(d) for d in cursor]
-    total = COL_LOGS.count_documents(query)
-    return {"total": total, "limit": limit, "skip": skip, "items": items}
+
+    # Logs before the archive watermark live in Parquet, not Mongo
+    watermark = get_watermark() if ARCHIVE_FANOUT else None
+    if watermark is None or (start and _parse_dt(start) >= watermark):
+        cursor = COL_LOGS.find(query).sort(sort_field, sort_dir).skip(skip).limit(limit)
+        items = [_to_output(d) for d in cursor]
+        total = count_logs(query, start, end)
+        return {"total": total, "limit": limit, "skip": skip, "items": items}
+
+    # Fan out: take the first skip+limit from each side, merge, then page
+    want = skip + limit
+    live = list(COL_LOGS.find(query).sort(sort_field, sort_dir).limit(want))
+    live_total = count_logs(query, start, end, floor=watermark)
+    archive_end = min(_parse_dt(end), watermark) if end else watermark
+    try:
+        archived_total, archived = query_archive(host, software, event_type, severity, q,
+                                                 _parse_dt(start), archive_end, want, sort_field, sort_dir)
+    except Exception as e:
+        print(f"[WARN] Archive query failed: {e}")
+        archived_total, archived = 0, []
+
+    # Rows of an unfinished archive run are in both Mongo and Parquet
+    live_ids = {str(d["_id"]) for d in live}
+    archived = [d for d in archived if str(d.get("_id")) not in live_ids]
+    merged = sorted(live + archived, key=_sort_key(sort_field), reverse=sort_dir < 0)
+    items = [_to_output(d) for d in merged[skip:want]]
+    return {"total": live_total + archived_total, "limit": limit, "skip": skip, "items": items}
@@ -7,9 +7,10 @@ from pymongo.errors import ServerSelectionTimeoutError
 # Allow running as script
 if __name__ == "__main__":
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-    from backend.db import COL_MATCHES, COL_LOGS, COL_CVES, COL_ALERTS
+    from backend.db import COL_MATCHES, COL_LOGS, COL_CVES, COL_ALERTS, COL_LOG_BUCKETS
 else:
-    from ..db import COL_MATCHES, COL_LOGS, COL_CVES, COL_ALERTS
+    from ..db import COL_MATCHES, COL_LOGS, COL_CVES, COL_ALERTS, COL_LOG_BUCKETS
+from parser_engine.storage import buckets_enabled, hourly_trend
 
 def get_stats(limit_hosts=20, limit_cves=20):
     """Get statistics from database with error handling"""
@@ -95,8 +96,11 @@ def get_stats(limit_hosts=20, limit_cves=20):
             {"$sort": {"_id": 1}}
         ]
         
-        # Logs trend
-        logs_trend = {d["_id"]: d["count"] for d in COL_LOGS.aggregate(pipeline_trend)}
+        # Logs trend (from the per-day buckets when they are maintained)
+        if buckets_enabled(COL_LOGS.database):
+            logs_trend = hourly_trend(COL_LOG_BUCKETS)
+        else:
+            logs_trend = {d["_id"]: d["count"] for d in COL_LOGS.aggregate(pipeline_trend)}
         
         # Alerts trend (use alert_generated_at instead of timestamp)
         pipeline_alerts_trend = [
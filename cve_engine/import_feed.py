@@ -0,0 +1,329 @@
+"""
+Offline CVE feed importer.
+
+Loads CVE data into cve_database from local files instead of the NVD API,
+for nodes without network access. Accepted inputs (files, directories or
+.zip bundles, optionally .gz/.bz2/.xz/.zst compressed):
+
+    NVD 2.0 JSON     {"vulnerabilities": [{"cve": {...}}, ...]} (API pages
+                     and feed downloads) or a bare array of those items
+    CVE-JSON-5       single records ({"cveMetadata": ..., "containers": ...}),
+                     arrays of records, or a cvelistV5 zip of record files
+
+Feeds are parsed incrementally: with ijson installed the array is read
+event by event, otherwise a json.JSONDecoder.raw_decode() loop decodes one
+element at a time from a sliding text buffer. Either way only the current
+record and the batches in flight are held in memory, however large the feed.
+
+Records are mapped onto the fetch_nvd.extract_fields() schema (CVE-JSON-5 is
+first adapted to the NVD 2.0 shape) and written with fetch_nvd.upsert_cves():
+unordered bulk upserts that keep a stored copy when it is as new or newer.
+Up to CVE_IMPORT_WRITERS batches are written in parallel.
+
+Usage:
+    python cve_engine/import_feed.py /data/nvd/nvdcve-2.0-*.json.gz
+    python cve_engine/import_feed.py cvelistV5-main.zip --writers 8 --batch-size 2000
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cve_engine.fetch_nvd import extract_fields, upsert_cves
+from parser_engine.readers import READ_BUFFER, open_log_file, strip_compression
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+BATCH_SIZE = int(os.environ.get("CVE_IMPORT_BATCH_SIZE", "1000"))
+WRITERS = int(os.environ.get("CVE_IMPORT_WRITERS", "4"))
+# Seconds between progress lines
+PROGRESS_EVERY = 10.0
+SNIFF_BYTES = 8192
+
+_NVD_ARRAY_RE = re.compile(r'"vulnerabilities"\s*:\s*\[')
+_NA = ("", "*", "n/a", "unspecified", "unknown", "-")
+
+
+# ------------------------------------------------------------
+# INPUT FILES
+# ------------------------------------------------------------
+def _is_feed(name):
+    base = strip_compression(name.lower())
+    return base.endswith(".json") or name.lower().endswith(".zip")
+
+
+def iter_feed_files(paths):
+    """Yield (name, open_fn) for every feed file under `paths`, zip members included."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for f in sorted(files):
+                    if _is_feed(f):
+                        yield from iter_feed_files([os.path.join(root, f)])
+        elif path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as zf:
+                for member in zf.namelist():
+                    if member.lower().endswith(".json"):
+                        yield f"{path}:{member}", lambda m=member: io.BufferedReader(zf.open(m), READ_BUFFER)
+        else:
+            yield path, lambda p=path: open_log_file(p)
+
+
+# ------------------------------------------------------------
+# STREAMING PARSE
+# ------------------------------------------------------------
+def detect_layout(head):
+    """'array', 'nvd' (object with a vulnerabilities array), 'record' or None."""
+    text = head.decode("utf-8", "ignore").lstrip("\ufeff \t\r\n")
+    if text.startswith("["):
+        return "array"
+    if text.startswith("{"):
+        if _NVD_ARRAY_RE.search(text):
+            return "nvd"
+        if '"cveMetadata"' in text:
+            return "record"
+    return None
+
+
+def iter_records(f):
+    """Yield the records of one feed stream without loading it whole."""
+    layout = detect_layout(f.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+    if layout == "record":
+        # A single CVE-JSON-5 record is small
+        yield json.load(io.TextIOWrapper(f, encoding="utf-8-sig"))
+    elif layout in ("array", "nvd"):
+        prefix = "item" if layout == "array" else "vulnerabilities.item"
+        if ijson is not None:
+            yield from ijson.items(f, prefix, use_float=True)
+        else:
+            yield from _iter_array(io.TextIOWrapper(f, encoding="utf-8-sig"), layout)
+    else:
+        raise ValueError("not an NVD 2.0 or CVE-JSON-5 feed")
+
+
+def _iter_array(text, layout, chunk_size=READ_BUFFER):
+    """
+    raw_decode() fallback: decode array elements one by one from a buffer
+    that only ever holds the unread tail plus one chunk.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    # Find the opening bracket of the array
+    while True:
+        more()
+        m = re.search(r"\[", buf) if layout == "array" else _NVD_ARRAY_RE.search(buf)
+        if m:
+            pos = m.end()
+            break
+        if eof:
+            raise ValueError("array not found")
+        # Keep a tail in case the key straddles two chunks
+        pos = max(0, len(buf) - 64)
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf):
+                break
+            if eof:
+                raise ValueError("unterminated array")
+            more()
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more()
+            continue
+        pos = end
+        yield item
+
+
+# ------------------------------------------------------------
+# RECORD ADAPTERS
+# ------------------------------------------------------------
+def _cve5_range(v):
+    """CVE-JSON-5 affected version entry -> version_compare range (or None)."""
+    if v.get("status", "affected") != "affected":
+        return None
+    start = str(v.get("version", "")).strip()
+    terms = [] if start.lower() in _NA or start == "0" else [start]
+    if v.get("lessThan") and str(v["lessThan"]).lower() not in _NA:
+        terms = ([">=" + start] if terms else []) + ["<" + str(v["lessThan"])]
+    elif v.get("lessThanOrEqual") and str(v["lessThanOrEqual"]).lower() not in _NA:
+        terms = ([">=" + start] if terms else []) + ["<=" + str(v["lessThanOrEqual"])]
+    return ",".join(terms) or None
+
+
+def from_cve5(record):
+    """
+    CVE-JSON-5 record -> NVD 2.0 shaped cve item for extract_fields().
+    Every affected product with at least one affected version becomes a
+    "vendors" entry, so each one lands in the record's "affected" list.
+    """
+    meta = record.get("cveMetadata", {})
+    if meta.get("state") == "REJECTED" or not meta.get("cveId"):
+        return None
+    containers = record.get("containers", {})
+    cna = containers.get("cna", {})
+
+    descriptions = [d for d in cna.get("descriptions", []) if str(d.get("lang", "en")).startswith("en")]
+    descriptions = descriptions or cna.get("descriptions", [])
+
+    metrics = {}
+    for container in [cna] + containers.get("adp", []):
+        for metric in container.get("metrics", []):
+            for key, nvd_key in (("cvssV3_1", "cvssMetricV31"), ("cvssV3_0", "cvssMetricV30"),
+                                 ("cvssV2_0", "cvssMetricV2")):
+                if key in metric and nvd_key not in metrics:
+                    data = metric[key]
+                    metrics[nvd_key] = [{"cvssData": data, "baseSeverity": data.get("baseSeverity", "Unknown")}]
+
+    weaknesses = [{"description": [{"value": d["cweId"]}]}
+                  for pt in cna.get("problemTypes", []) for d in pt.get("descriptions", []) if d.get("cweId")]
+
+    vendors = []
+    for affected in cna.get("affected", []):
+        vendor, product = affected.get("vendor", ""), affected.get("product", "")
+        if str(vendor).lower() in _NA or str(product).lower() in _NA:
+            continue
+        ranges = [r for r in (_cve5_range(v) for v in affected.get("versions", [])) if r]
+        if ranges:
+            vendors.append({"vendorName": vendor, "products": [
+                {"productName": product, "versions": [{"versionValue": r} for r in ranges]}]})
+
+    item = {
+        "id": meta["cveId"],
+        "descriptions": descriptions,
+        "metrics": metrics,
+        "weaknesses": weaknesses,
+        "vendors": vendors,
+    }
+    if meta.get("datePublished"):
+        item["published"] = meta["datePublished"]
+    if meta.get("dateUpdated") or meta.get("datePublished"):
+        item["lastModified"] = meta.get("dateUpdated") or meta["datePublished"]
+    return item
+
+
+def adapt(record):
+    """Any supported record -> NVD 2.0 cve item, or None to skip it."""
+    if not isinstance(record, dict):
+        return None
+    if isinstance(record.get("cve"), dict):
+        item = record["cve"]
+    elif "cveMetadata" in record:
+        return from_cve5(record)
+    elif "id" in record and "descriptions" in record:
+        item = record
+    else:
+        return None
+    if not item.get("id") or item.get("vulnStatus") == "Rejected":
+        return None
+    return item
+
+
+# ------------------------------------------------------------
+# IMPORT
+# ------------------------------------------------------------
+def import_feeds(paths, batch_size=BATCH_SIZE, writers=WRITERS):
+    stats = {"files": 0, "records": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+             "skipped": 0, "failed_files": 0}
+    t0 = time.perf_counter()
+    last_report = t0
+    pool = ThreadPoolExecutor(max_workers=max(1, writers), thread_name_prefix="cve-import")
+    in_flight = deque()
+
+    def collect(future):
+        inserted, updated, unchanged = future.result()
+        stats["inserted"] += inserted
+        stats["updated"] += updated
+        stats["unchanged"] += unchanged
+
+    def submit(batch):
+        # Bounded: at most `writers` batches queued behind the running ones
+        while len(in_flight) >= 2 * max(1, writers):
+            collect(in_flight.popleft())
+        in_flight.append(pool.submit(upsert_cves, batch))
+
+    try:
+        batch = []
+        for name, open_fn in iter_feed_files(paths):
+            stats["files"] += 1
+            try:
+                with open_fn() as f:
+                    for record in iter_records(f):
+                        item = adapt(record)
+                        if item is None:
+                            stats["skipped"] += 1
+                            continue
+                        batch.append(extract_fields(item))
+                        stats["records"] += 1
+                        if len(batch) >= batch_size:
+                            submit(batch)
+                            batch = []
+                            now = time.perf_counter()
+                            if now - last_report >= PROGRESS_EVERY:
+                                last_report = now
+                                print(f"[i] {stats['records']} CVEs, {stats['records'] / (now - t0):.0f} records/s")
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                stats["failed_files"] += 1
+                print(f"[WARN] Skipping {name}: {e}")
+        if batch:
+            submit(batch)
+        while in_flight:
+            collect(in_flight.popleft())
+    finally:
+        pool.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 2)
+    stats["records_per_sec"] = round(stats["records"] / elapsed, 1) if elapsed > 0 else 0.0
+    stats["parser"] = "ijson" if ijson is not None else "raw_decode"
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import local NVD 2.0 / CVE-JSON-5 feeds into cve_database.")
+    ap.add_argument("paths", nargs="+", help="feed files, directories or .zip bundles")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--writers", type=int, default=WRITERS)
+    args = ap.parse_args(argv)
+
+    print(f"\n[+] Importing CVE feeds ({'ijson' if ijson is not None else 'raw_decode'} parser, "
+          f"{args.writers} writer(s), batches of {args.batch_size})...")
+    stats = import_feeds(args.paths, args.batch_size, args.writers)
+    print(f"\n[✓] {stats['records']} CVEs from {stats['files']} file(s) in {stats['seconds']}s "
+          f"({stats['records_per_sec']} records/s): {stats['inserted']} new, {stats['updated']} updated, "
+          f"{stats['unchanged']} unchanged, {stats['skipped']} skipped")
+    if stats["failed_files"]:
+        print(f"[WARN] {stats['failed_files']} file(s) could not be read")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
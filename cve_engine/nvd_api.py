@@ -1,41 +1,32 @@
-import requests
-import time
 import logging
-import os
 from dotenv import load_dotenv
 
-load_dotenv()
+from cve_engine.nvd_client import NVDError, get_client
 
-# NVD API Configuration
-NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
-API_KEY = os.getenv("NVD_API_KEY")
+load_dotenv()
 
 logger = logging.getLogger("nvd_api")
 
+def search_nvd_cves(keyword, limit=50):
+    """
+    Like query_nvd_cves(), but raises NVDError when the request fails, so
+    callers that cache results can tell "no CVEs" from an error.
+    Rate limiting and retries are handled by the shared NVD client.
+    """
+    vulnerabilities = get_client().search(keyword, limit)
+    return [parse_nvd_item(item) for item in vulnerabilities]
+
 def query_nvd_cves(keyword, limit=50):
     """
     Search NVD for CVEs related to a specific keyword (e.g., "linux kernel 5.4").
+    Returns [] if the request fails.
     """
-    headers = {
-        "apiKey": API_KEY
-    }
-    params = {
-        "keywordSearch": keyword,
-        "resultsPerPage": limit
-    }
-    
     try:
         print(f"[API] Querying NVD for: {keyword}")
-        response = requests.get(NVD_API_URL, headers=headers, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            vulnerabilities = data.get("vulnerabilities", [])
-            return [parse_nvd_item(item) for item in vulnerabilities]
-        else:
-            print(f"[ERR] NVD API failed: {response.status_code} - {response.text}")
-            return []
-            
+        return search_nvd_cves(keyword, limit)
+    except NVDError as e:
+        print(f"[ERR] NVD API failed: {e}")
+        return []
     except Exception as e:
         print(f"[ERR] Exception querying NVD: {e}")
         return []
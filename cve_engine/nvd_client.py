@@ -0,0 +1,242 @@
+"""
+Shared NVD CVE API 2.0 client.
+
+One NVDClient per process (get_client()) is used by nvd_api, fetch_nvd and
+scripts/seed_cves.py:
+
+  - one requests.Session with a keep-alive connection pool sized for the
+    worker threads
+  - a token bucket honoring NVD's rolling quotas: 5 requests per 30 s
+    without an API key, 50 per 30 s with one (NVD_API_KEY). A spent token
+    returns 30 s (+ NVD_RATE_SLACK) after it was taken, so no 30-second
+    window ever holds more than the quota.
+  - bounded retries with full-jitter exponential backoff on 403/429/5xx and
+    connection errors (Retry-After is honored when NVD sends it)
+  - a thread pool for concurrent in-flight requests: search_many() and
+    iter_pages() keep up to NVD_MAX_WORKERS requests on the wire
+
+NVD_API_URL points the client at another endpoint, e.g. a local mock server
+in tests.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NVD_API_URL = os.getenv("NVD_API_URL", "https://services.nvd.nist.gov/rest/json/cves/2.0")
+NVD_API_KEY = os.getenv("NVD_API_KEY")
+NVD_MAX_WORKERS = int(os.getenv("NVD_MAX_WORKERS", "4"))
+NVD_MAX_RETRIES = int(os.getenv("NVD_MAX_RETRIES", "5"))
+NVD_TIMEOUT = float(os.getenv("NVD_TIMEOUT", "30"))
+# Documented quotas per rolling 30 seconds
+NVD_PERIOD = 30.0
+NVD_QUOTA_PUBLIC = 5
+NVD_QUOTA_KEYED = 50
+# Extra seconds a token is held, so latency jitter cannot squeeze one
+# request too many into NVD's window as it counts arrivals
+NVD_RATE_SLACK = float(os.getenv("NVD_RATE_SLACK", "1"))
+NVD_PAGE_SIZE = 2000
+
+RETRY_STATUS = {403, 429, 500, 502, 503, 504}
+
+
+class NVDError(Exception):
+    """An NVD request failed after all retries (or with a non-retryable status)."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------------------------------------------------
+# RATE LIMITING
+# ------------------------------------------------------------
+class TokenBucket:
+    """
+    `capacity` tokens; each one taken comes back `period` seconds later.
+    acquire() blocks until a token is free and returns the seconds waited.
+    """
+    def __init__(self, capacity, period):
+        self.capacity = max(1, int(capacity))
+        self.period = float(period)
+        self._spent = deque()  # refill times of the tokens in use
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        waited = 0.0
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._spent and self._spent[0] <= now:
+                    self._spent.popleft()
+                if len(self._spent) < self.capacity:
+                    self._spent.append(now + self.period)
+                    return waited
+                delay = self._spent[0] - now
+                self._cond.wait(delay)
+                waited += delay
+
+    def penalize(self, seconds):
+        """Hold every token for `seconds` more (after a 403/429 from NVD)."""
+        with self._cond:
+            until = time.monotonic() + seconds
+            self._spent = deque(max(t, until) for t in self._spent)
+            while len(self._spent) < self.capacity:
+                self._spent.append(until)
+
+
+# ------------------------------------------------------------
+# CLIENT
+# ------------------------------------------------------------
+class NVDClient:
+    def __init__(self, api_key=NVD_API_KEY, base_url=NVD_API_URL, max_workers=NVD_MAX_WORKERS,
+                 max_retries=NVD_MAX_RETRIES, timeout=NVD_TIMEOUT, quota=None, period=NVD_PERIOD,
+                 slack=NVD_RATE_SLACK, backoff_base=1.0, backoff_cap=30.0):
+        self.api_key = api_key or None
+        self.base_url = base_url
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        quota = quota or (NVD_QUOTA_KEYED if self.api_key else NVD_QUOTA_PUBLIC)
+        self.bucket = TokenBucket(quota, period + slack)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if self.api_key:
+            self.session.headers["apiKey"] = self.api_key
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.counters = dict.fromkeys(("requests", "retries", "failures", "throttled_seconds"), 0)
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.counters[key] += n
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        # Full jitter: uniform over [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def get(self, params=None):
+        """One GET against the CVE endpoint; returns the decoded JSON body."""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            self._count("throttled_seconds", self.bucket.acquire())
+            self._count("requests")
+            response = None
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                last_error = NVDError(f"NVD returned {response.status_code}: {response.text[:200]}",
+                                      response.status_code)
+                if response.status_code not in RETRY_STATUS:
+                    break
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = NVDError(f"NVD request failed: {e}")
+            except ValueError as e:
+                last_error = NVDError(f"NVD returned invalid JSON: {e}")
+                break
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, response)
+            if response is not None and response.status_code in (403, 429):
+                # Quota exceeded: slow every thread down, not only this one
+                self.bucket.penalize(delay)
+            self._count("retries")
+            time.sleep(delay)
+        self._count("failures")
+        raise last_error
+
+    # --------------------------------------------------------
+    # CONCURRENCY
+    # --------------------------------------------------------
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nvd")
+            return self._pool
+
+    def map(self, fn, items):
+        """fn(item) for every item across the worker threads, results in order."""
+        return list(self.pool.map(fn, items))
+
+    def search(self, keyword, limit=50, **params):
+        """Vulnerability items for a keyword search (raises NVDError)."""
+        data = self.get(dict(params, keywordSearch=keyword, resultsPerPage=limit))
+        return data.get("vulnerabilities", [])
+
+    def search_many(self, keywords, limit=50, **params):
+        """
+        Concurrent keyword searches. Returns {keyword: items}; a keyword
+        whose request failed maps to its NVDError instead.
+        """
+        def one(keyword):
+            try:
+                return self.search(keyword, limit, **params)
+            except NVDError as e:
+                return e
+        return dict(zip(keywords, self.map(one, list(keywords))))
+
+    def iter_pages(self, params=None, page_size=NVD_PAGE_SIZE):
+        """
+        Yield every page (decoded JSON) of a paginated query in startIndex
+        order. The first page gives totalResults; the rest are fetched with
+        up to max_workers requests in flight.
+        """
+        params = dict(params or {}, resultsPerPage=page_size)
+        first = self.get(dict(params, startIndex=0))
+        yield first
+        total = int(first.get("totalResults", 0))
+        starts = deque(range(page_size, total, page_size))
+        window = deque()
+        while starts or window:
+            while starts and len(window) < self.max_workers:
+                window.append(self.pool.submit(self.get, dict(params, startIndex=starts.popleft())))
+            yield window.popleft().result()
+
+    def stats(self):
+        with self._stats_lock:
+            s = dict(self.counters)
+        s["throttled_seconds"] = round(s["throttled_seconds"], 2)
+        s["quota"] = f"{self.bucket.capacity}/{self.bucket.period:g}s"
+        return s
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide NVDClient (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = NVDClient()
+        return _client
@@ -5,6 +5,9 @@ Features:
 - parse_version(v): returns a tuple (numeric_parts:list[int], pre_release:str or "")
 - compare_versions(a, b): returns -1 if a<b, 0 if equal, 1 if a>b
 - satisfies(version, range_expr): returns True/False
+- compile_range(range_expr) / satisfies_compiled(version, compiled): the same
+  check with the range parsed once up front, for matching many versions
+  against a fixed set of ranges (see matching_engine.cve_index)
   Supports operators: =, ==, !=, >, >=, <, <=
   Supports hyphen ranges: "1.2.0 - 1.4.5"
   Supports caret ^ (compatible with), tilde ~ (patch compatible),
@@ -97,8 +100,13 @@ def compare_versions(a: str, b: str) -> int:
     Compare two version strings.
     Returns -1 if a < b, 0 if equal, 1 if a > b
     """
-    a_num, a_pre = parse_version(a)
-    b_num, b_pre = parse_version(b)
+    return compare_parsed(parse_version(a), parse_version(b))
+
+
+def compare_parsed(a, b) -> int:
+    """compare_versions() on two parse_version() results."""
+    a_num, a_pre = a
+    b_num, b_pre = b
 
     num_cmp = _cmp_numeric_lists(a_num, b_num)
     if num_cmp != 0:
@@ -334,6 +342,61 @@ def satisfies(version: str, range_expr: str) -> bool:
     return False
 
 
+# -------------------------
+# Pre-compiled ranges
+# -------------------------
+_OPS = {
+    "=": lambda c: c == 0,
+    "==": lambda c: c == 0,
+    "!=": lambda c: c != 0,
+    ">": lambda c: c == 1,
+    ">=": lambda c: c >= 0,
+    "<": lambda c: c == -1,
+    "<=": lambda c: c <= 0,
+}
+
+
+def _split_and(or_part):
+    if "," in or_part:
+        return [t for t in or_part.split(",") if t.strip() != ""]
+    return [t for t in re.split(r'\s+', or_part) if t.strip() != ""]
+
+
+def compile_range(range_expr: str):
+    """
+    Parse a range expression once. Returns a tuple of OR alternatives, each
+    a tuple of (predicate, parsed_version) requirements, or None for an
+    empty range (accepts everything). Requirements with an unsupported
+    operator get a predicate that always fails, as in satisfies().
+    """
+    if range_expr is None or range_expr.strip() == "":
+        return None
+    alternatives = []
+    for or_part in (p.strip() for p in range_expr.split("||")):
+        if not or_part:
+            continue
+        reqs = []
+        for token in _split_and(or_part):
+            for op, ver in _parse_single_range(token):
+                reqs.append((_OPS.get(op, lambda c: False), parse_version(ver)))
+        alternatives.append(tuple(reqs))
+    return tuple(alternatives)
+
+
+def satisfies_compiled(version, compiled) -> bool:
+    """
+    satisfies() against a compile_range() result. `version` may be a
+    string or an already parsed parse_version() tuple.
+    """
+    if compiled is None:
+        return True
+    parsed = parse_version(version) if isinstance(version, str) or version is None else version
+    for reqs in compiled:
+        if all(pred(compare_parsed(parsed, target)) for pred, target in reqs):
+            return True
+    return False
+
+
 # -------------------------
 # Some convenience helpers
 # -------------------------
@@ -360,6 +423,7 @@ if __name__ == "__main__":
 
     for ver, rng in tests:
         print(f"{ver} satisfies {rng}? -> {satisfies(ver, rng)}")
+        assert satisfies_compiled(ver, compile_range(rng)) == satisfies(ver, rng)
 
     # comparison checks
     cmp_cases = [
@@ -0,0 +1,192 @@
+"""
+Two-tier cache for CVE lookups by (software, version).
+
+    tier 1  in-process LRU (CVE_CACHE_LRU_SIZE entries), per worker
+    tier 2  Mongo collection cve_lookup_cache, shared by every scheduler
+            thread, uvicorn worker and matching run
+
+Keys are normalized ("sshd", "OpenSSH 7.2p2" -> "nvd|sshd|openssh 7.2p2").
+An empty result is cached too (negative entry) with its own, shorter TTL, so
+products with no CVEs are not re-queried on every run either. Entries carry
+expires_at; a TTL index lets MongoDB purge them, and reads ignore entries
+that expired but were not purged yet.
+
+get_or_load() serializes concurrent misses on the same key within a process,
+so only one thread queries the upstream source for it. A loader returning
+None (lookup failed) is not cached.
+
+If the Mongo tier fails the cache keeps working from memory and counts the
+error in stats()["store_errors"].
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+
+CACHE_COLLECTION = "cve_lookup_cache"
+LRU_SIZE = int(os.environ.get("CVE_CACHE_LRU_SIZE", "4096"))
+POSITIVE_TTL_HOURS = float(os.environ.get("CVE_CACHE_TTL_HOURS", str(7 * 24)))
+NEGATIVE_TTL_HOURS = float(os.environ.get("CVE_CACHE_NEGATIVE_TTL_HOURS", "12"))
+
+
+def cache_key(software, version, source="nvd"):
+    sw = " ".join(str(software or "").lower().split())
+    ver = " ".join(str(version or "").lower().split())
+    return f"{source}|{sw}|{ver}"
+
+
+class CVECache:
+    def __init__(self, collection=None, lru_size=LRU_SIZE, positive_ttl_hours=POSITIVE_TTL_HOURS,
+                 negative_ttl_hours=NEGATIVE_TTL_HOURS, source="nvd"):
+        self.collection = collection
+        self.lru_size = max(1, int(lru_size))
+        self.positive_ttl = timedelta(hours=positive_ttl_hours)
+        self.negative_ttl = timedelta(hours=negative_ttl_hours)
+        self.source = source
+        self._lru = OrderedDict()  # key -> (expires_at, cves)
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, callers holding or waiting on it]
+        self._indexed = False
+        self.counters = dict.fromkeys(
+            ("memory_hits", "store_hits", "misses", "expired", "evictions", "writes", "store_errors"), 0)
+
+    # --------------------------------------------------------
+    # TIER 1: LRU
+    # --------------------------------------------------------
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._lru[key]
+                self.counters["expired"] += 1
+                return None
+            self._lru.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key, expires_at, cves):
+        with self._lock:
+            self._lru[key] = (expires_at, cves)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    # --------------------------------------------------------
+    # TIER 2: MONGO
+    # --------------------------------------------------------
+    def _ensure_index(self):
+        if self._indexed or self.collection is None:
+            return
+        self._indexed = True
+        try:
+            # expireAfterSeconds=0: each document expires at its own expires_at
+            self.collection.create_index("expires_at", name="expires_at_ttl", expireAfterSeconds=0)
+        except PyMongoError as e:
+            self.counters["store_errors"] += 1
+            print(f"[WARN] Could not create CVE cache TTL index: {e}")
+
+    def _store_get(self, key, now):
+        if self.collection is None:
+            return None
+        self._ensure_index()
+        try:
+            doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": now}})
+        except PyMongoError:
+            self.counters["store_errors"] += 1
+            return None
+        if doc is None:
+            return None
+        self._memory_put(key, doc["expires_at"], doc.get("cves") or [])
+        return doc.get("cves") or []
+
+    def _store_put(self, key, software, version, cves, expires_at, now):
+        if self.collection is None:
+            return
+        self._ensure_index()
+        try:
+            self.collection.replace_one({"_id": key}, {
+                "_id": key, "source": self.source, "software": software, "version": version,
+                "cves": cves, "negative": not cves, "cached_at": now, "expires_at": expires_at,
+            }, upsert=True)
+        except PyMongoError:
+            self.counters["store_errors"] += 1
+
+    # --------------------------------------------------------
+    # PUBLIC API
+    # --------------------------------------------------------
+    def get(self, software, version):
+        """Cached CVE list for the pair, or None on a miss."""
+        key = cache_key(software, version, self.source)
+        now = datetime.utcnow()
+        cves = self._memory_get(key, now)
+        if cves is not None:
+            self.counters["memory_hits"] += 1
+            return cves
+        cves = self._store_get(key, now)
+        if cves is not None:
+            self.counters["store_hits"] += 1
+            return cves
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, software, version, cves):
+        key = cache_key(software, version, self.source)
+        now = datetime.utcnow()
+        expires_at = now + (self.positive_ttl if cves else self.negative_ttl)
+        cves = list(cves)
+        self._memory_put(key, expires_at, cves)
+        self._store_put(key, software, version, cves, expires_at, now)
+        self.counters["writes"] += 1
+
+    def get_or_load(self, software, version, loader):
+        """
+        Return (cves, loaded): the cached list, or loader() on a miss
+        (cached unless it returns None). `loaded` is True when loader ran.
+        """
+        cves = self.get(software, version)
+        if cves is not None:
+            return cves, False
+        key = cache_key(software, version, self.source)
+        # The lock stays in the map while anyone holds or waits on it, so
+        # every caller for a key serializes on the same lock
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have loaded it while we waited
+                now = datetime.utcnow()
+                cves = self._memory_get(key, now)
+                if cves is not None:
+                    return cves, False
+                cves = loader()
+                if cves is not None:
+                    self.put(software, version, cves)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+        return (cves if cves is not None else []), True
+
+    def clear(self, store=False):
+        with self._lock:
+            self._lru.clear()
+        if store and self.collection is not None:
+            self.collection.delete_many({"source": self.source})
+
+    def __len__(self):
+        return len(self._lru)
+
+    def stats(self):
+        s = dict(self.counters)
+        lookups = s["memory_hits"] + s["store_hits"] + s["misses"]
+        s["hit_rate"] = round((s["memory_hits"] + s["store_hits"]) / lookups, 3) if lookups else 0.0
+        s["size"] = len(self._lru)
+        return s
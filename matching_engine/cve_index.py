@@ -0,0 +1,204 @@
+"""
+Local CVE index: version-aware matching without the NVD API.
+
+CVEIndex.build(cve_collection) streams cve_database once and maps each
+normalized product name to its CVE records, with every version range
+pre-parsed by cve_engine.version_compare.compile_range(). A record is
+indexed under every product of its "affected" list (fetch_nvd.extract_fields)
+or, without one, under product/affected_versions. lookup() then resolves a
+(software, version) pair from the logs in memory:
+
+  - software -> candidate product keys: the normalized name itself, the
+    built-in PRODUCT_ALIASES, and the CPE product of every enrichment rule
+    (parser_engine/enrichment_rules.json) whose keyword occurs in the name
+    ("sshd" -> openssh, "apache2" -> http_server)
+  - version  -> the first dotted number in the string ("OpenSSH 7.2p2" ->
+    "7.2p2"), parsed once and checked with satisfies_compiled()
+
+CVE records without any usable version range are skipped rather than
+matched on product alone, so every match is a version match.
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+
+from cve_engine.version_compare import compile_range, parse_version, satisfies_compiled
+
+RULES_FILE = os.environ.get(
+    "INGEST_ENRICHMENT_RULES",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "parser_engine", "enrichment_rules.json")),
+)
+
+# Log software name -> cve_database product names (normalized)
+PRODUCT_ALIASES = {
+    "sshd": ["openssh"],
+    "ssh": ["openssh"],
+    "apache": ["http_server"],
+    "apache2": ["http_server"],
+    "httpd": ["http_server"],
+    "named": ["bind"],
+    "bind9": ["bind"],
+    "kernel": ["linux_kernel"],
+    "linux": ["linux_kernel"],
+    "chrome": ["chrome"],
+    "msedge": ["edge_chromium", "edge"],
+    "winword": ["word"],
+    "excel": ["excel"],
+    "outlook": ["outlook"],
+}
+
+# affected_versions placeholders that carry no range
+_NO_RANGE = {"", "-", "unknown", "n/a", "na", "none"}
+_VERSION_RE = re.compile(r"\d+(?:[._]\w+)*(?:-[\w.]+)?")
+# "< 7.3" -> "<7.3": satisfies() splits AND terms on whitespace
+_OP_SPACE_RE = re.compile(r"(>=|<=|!=|==|>|<|=|\^|~)\s+")
+
+
+def normalize_product(name):
+    """'Print Spooler' -> 'print_spooler', 'chrome.exe' -> 'chrome'."""
+    s = str(name or "").strip().lower()
+    if s.endswith(".exe"):
+        s = s[:-4]
+    return re.sub(r"[^a-z0-9]+", "_", s).strip("_")
+
+
+def normalize_version(version):
+    """First dotted version number in a log version string, or None."""
+    if version is None:
+        return None
+    m = _VERSION_RE.search(str(version))
+    return m.group(0) if m else None
+
+
+def _enrichment_aliases(path=RULES_FILE):
+    """(keyword, cpe_product) pairs from the enrichment rules."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+    except (OSError, ValueError):
+        return []
+    pairs = []
+
+    def add(keyword, cpe):
+        parts = (cpe or "").split(":")
+        if keyword and len(parts) > 4 and parts[4] not in ("", "*"):
+            pairs.append((str(keyword).lower(), normalize_product(parts[4])))
+
+    for ruleset in rules.get("version_rules", {}).values():
+        for rule in ruleset:
+            add(rule.get("match"), rule.get("cpe"))
+    for rule in rules.get("raw_rules", []):
+        add(rule.get("software"), rule.get("cpe"))
+    return pairs
+
+
+def _compile_ranges(versions):
+    if isinstance(versions, str):
+        versions = [versions]
+    ranges = []
+    for expr in versions or []:
+        if expr is None or str(expr).strip().lower() in _NO_RANGE:
+            continue
+        try:
+            ranges.append(compile_range(_OP_SPACE_RE.sub(r"\1", str(expr).strip())))
+        except Exception:
+            continue
+    return ranges
+
+
+class CVEIndex:
+    def __init__(self, aliases=None, keyword_aliases=None):
+        self.by_product = defaultdict(list)  # product -> [(cve, compiled_ranges)]
+        self.aliases = {k: list(v) for k, v in (aliases or PRODUCT_ALIASES).items()}
+        self.keyword_aliases = _enrichment_aliases() if keyword_aliases is None else keyword_aliases
+        self.cves = 0
+        self.skipped = 0
+        self._keys_cache = {}
+        self._lookup_cache = {}
+
+    # --------------------------------------------------------
+    # BUILD
+    # --------------------------------------------------------
+    @classmethod
+    def build(cls, collection, **kwargs):
+        index = cls(**kwargs)
+        projection = {"cve_id": 1, "vendor": 1, "product": 1, "affected_versions": 1, "affected": 1,
+                      "cvss_score": 1, "severity": 1, "description": 1}
+        for doc in collection.find({}, projection):
+            index.add(doc)
+        return index
+
+    def add(self, doc):
+        entries = doc.get("affected") or [{"product": doc.get("product"), "versions": doc.get("affected_versions")}]
+        cve = {
+            "cve_id": doc.get("cve_id") or doc.get("_id"),
+            "description": doc.get("description", ""),
+            "cvss_score": doc.get("cvss_score", 0.0),
+            "severity": doc.get("severity", "UNKNOWN"),
+        }
+        indexed = False
+        for entry in entries:
+            product = normalize_product(entry.get("product"))
+            ranges = _compile_ranges(entry.get("versions"))
+            if not product or product == "unknown" or not ranges:
+                continue
+            self.by_product[product].append((cve, ranges))
+            indexed = True
+        if indexed:
+            self.cves += 1
+        else:
+            self.skipped += 1
+
+    def __len__(self):
+        return self.cves
+
+    # --------------------------------------------------------
+    # LOOKUP
+    # --------------------------------------------------------
+    def product_keys(self, software):
+        keys = self._keys_cache.get(software)
+        if keys is not None:
+            return keys
+        name = normalize_product(software)
+        keys = [name] if name else []
+        keys.extend(self.aliases.get(name, []))
+        lowered = str(software or "").lower()
+        keys.extend(product for keyword, product in self.keyword_aliases if keyword in lowered)
+        keys = [k for k in dict.fromkeys(keys) if k in self.by_product]
+        self._keys_cache[software] = keys
+        return keys
+
+    def lookup(self, software, version, limit=0):
+        """CVEs whose product and affected range cover (software, version), highest CVSS first."""
+        cached = self._lookup_cache.get((software, version, limit))
+        if cached is not None:
+            return cached
+        ver = normalize_version(version)
+        if not ver:
+            self._lookup_cache[(software, version, limit)] = []
+            return []
+        parsed = parse_version(ver)
+        found = {}
+        for key in self.product_keys(software):
+            for cve, ranges in self.by_product[key]:
+                if cve["cve_id"] in found:
+                    continue
+                if any(satisfies_compiled(parsed, r) for r in ranges):
+                    found[cve["cve_id"]] = cve
+        result = sorted(found.values(), key=lambda c: _score(c), reverse=True)
+        result = result[:limit] if limit else result
+        self._lookup_cache[(software, version, limit)] = result
+        return result
+
+    def stats(self):
+        return {"cves": self.cves, "products": len(self.by_product), "skipped": self.skipped,
+                "lookups": len(self._lookup_cache)}
+
+
+def _score(cve):
+    try:
+        return float(cve.get("cvss_score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
@@ -1,16 +1,23 @@
 """
-PHASE 3 — STEP 1 (API-BASED MATCHING)
+PHASE 3 — STEP 1 (CVE MATCHING)
 
 This matcher:
  1. Scans normalized logs.
  2. Identifies software/version info.
- 3. Queries NVD API directly for vulnerabilities (using caching to avoid rate limits).
+ 3. Resolves vulnerabilities from the local CVE index built from
+    'cve_database' (matching_engine.cve_index: product + version range
+    match, no network), or queries the NVD API directly when
+    MATCH_SOURCE=nvd or the local database is empty.
  4. Stores matches in 'vuln_matches'.
+
+In the default "grouped" mode steps 1-2 run as one aggregation over the
+distinct (software, version) pairs, so the API is queried once per pair and
+matches are fanned out to that pair's logs with bulk upserts.
 """
 
 import re
 import time
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from datetime import datetime
 import sys
 import os
@@ -24,7 +31,10 @@ load_dotenv(env_path, override=True)
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from cve_engine.nvd_api import query_nvd_cves
+from cve_engine.nvd_api import search_nvd_cves
+from cve_engine.nvd_client import NVDError, get_client
+from matching_engine.cve_index import CVEIndex
+from matching_engine.cve_cache import CACHE_COLLECTION, CVECache
 
 # ----------------------------
 # CONFIG
@@ -43,20 +53,40 @@ CVE_COL = "cve_database"
 # Limit logs to process to avoid API spamming during testing
 LOG_LIMIT = 5000
 
+# "grouped": resolve CVEs per distinct (software, version) and fan out in bulk
+# "per_log": original one-log-at-a-time pass (payload key 'mode' overrides)
+MATCH_MODES = ("grouped", "per_log")
+MATCH_MODE = os.getenv("MATCH_MODE", "grouped")
+MATCH_BULK_SIZE = int(os.getenv("MATCH_BULK_SIZE", "1000"))
+
+# "local": version-aware lookup in the cve_database index (no network)
+# "nvd":   live NVD keyword search (payload key 'source' overrides)
+MATCH_SOURCES = ("local", "nvd")
+MATCH_SOURCE = os.getenv("MATCH_SOURCE", "local")
+# Most CVEs recorded per software/version in local mode (0 = all)
+MATCH_MAX_CVES = int(os.getenv("MATCH_MAX_CVES", "0"))
+
 client = MongoClient(MONGO_URI)
 db = client[DB]
 logs = db[LOGS_COL]
 matches = db[MATCH_COL]
 cves_col = db[CVE_COL]
 
-# Cache: "software version" -> [cve_list]
-CVE_CACHE = {}
+# NVD lookups by (software, version): in-process LRU + shared Mongo tier
+CVE_CACHE = CVECache(db[CACHE_COLLECTION])
+
+# Local CVE index for the current run (None = NVD API mode)
+CVE_INDEX = None
 
 # ----------------------------
 # VERSION EXTRACTION
 # ----------------------------
 KERNEL_REGEX = re.compile(r"Linux version\s+([0-9]+\.[0-9]+\.[0-9]+)", re.IGNORECASE)
 
+def _usable(sw, ver):
+    return (isinstance(sw, str) and isinstance(ver, str) and sw and ver
+            and sw.lower() != "unknown" and ver.lower() != "unknown")
+
 def extract_software_version(log):
     """
     Returns a tuple (software, version) or (None, None)
@@ -67,109 +97,264 @@ def extract_software_version(log):
     
     # 2. Try Kernel Regex in message
     msg = log.get("message", "")
-    m = KERNEL_REGEX.search(msg)
+    m = KERNEL_REGEX.search(msg) if isinstance(msg, str) else None
     if m:
         return "linux_kernel", m.group(1)
 
     # 3. Return explicit if valid
-    if sw and ver and sw.lower() != "unknown" and ver.lower() != "unknown":
+    if _usable(sw, ver):
         return sw, ver
         
     return None, None
 
 # ----------------------------
-# MATCHING LOGIC
+# CVE RESOLUTION
 # ----------------------------
+def resolve_cves(sw, ver):
+    """
+    CVEs for one (software, version) pair, queried once and cached.
+    Newly seen CVEs are stored in cve_database for frontend visibility.
+    Returns (cve_list, new_cves_stored).
+    """
+    if CVE_INDEX is not None:
+        return CVE_INDEX.lookup(sw, ver, MATCH_MAX_CVES), 0
+
+    def load():
+        # The shared NVD client rate-limits and retries; None (failed) is not cached
+        print(f"[API] Querying NVD for: {sw} {ver}")
+        try:
+            return search_nvd_cves(f"{sw} {ver}", limit=5) # Limit 5 matches per software to save space/time
+        except NVDError as e:
+            print(f"[ERR] NVD API failed: {e}")
+            return None
+
+    cve_list, loaded = CVE_CACHE.get_or_load(sw, ver, load)
+    if not loaded:
+        return cve_list, 0
+
+    new_cves_stored = 0
+    for cve in cve_list:
+        # Upsert to avoid duplicates
+        res = cves_col.update_one(
+            {"cve_id": cve["cve_id"]},
+            {"$set": {
+                "cve_id": cve["cve_id"],
+                "description": cve["description"],
+                "cvss_score": cve["cvss_score"],
+                "severity": cve["severity"],
+                "last_updated": datetime.utcnow(),
+                "source": "NVD_API"
+            }},
+            upsert=True
+        )
+        if res.upserted_id:
+            new_cves_stored += 1
+    return cve_list, new_cves_stored
+
+def match_doc(log, sw, ver, cve):
+    """vuln_matches document for one (log, CVE)."""
+    return {
+        "_id": f"{log['_id']}__{cve['cve_id']}",
+        "matched_at": datetime.utcnow(),
+        "log_id": str(log["_id"]),
+        "host": log.get("host"),
+        "timestamp": log.get("timestamp"),
+        "software": sw,
+        "version": ver,
+        "cve_id": cve["cve_id"],
+        "severity": cve["severity"],
+        "cvss_score": cve["cvss_score"],
+        "description": cve["description"],
+        "message": log.get("message")
+    }
+
 # ----------------------------
-# MATCHING LOGIC
+# GROUPED MATCHING
 # ----------------------------
-def main(payload=None):
-    print("\n[+] Starting API-based Vulnerability Matching...")
-    print(f"[+] Log Limit: {LOG_LIMIT}")
+def inventory_pipeline():
+    """
+    Distinct (software, version) pairs with their log count and hosts.
+    Applies the kernel regex server-side ($regexFind), so a log whose message
+    carries "Linux version x.y.z" lands in ("linux_kernel", "x.y.z") exactly
+    as extract_software_version() would place it.
+    """
+    message = {"$cond": [{"$eq": [{"$type": "$message"}, "string"]}, "$message", ""]}
+    kernel = {"$regexFind": {"input": message, "regex": KERNEL_REGEX.pattern, "options": "i"}}
+    is_kernel = {"$ne": ["$kernel", None]}
+    return [
+        {"$project": {"host": 1, "software": 1, "version": 1, "kernel": kernel}},
+        {"$group": {
+            "_id": {
+                "software": {"$cond": [is_kernel, "linux_kernel", "$software"]},
+                "version": {"$cond": [is_kernel, {"$arrayElemAt": ["$kernel.captures", 0]}, "$version"]},
+            },
+            "logs": {"$sum": 1},
+            "hosts": {"$addToSet": "$host"},
+        }},
+        {"$sort": {"logs": -1}},
+    ]
 
-    # Reset if requested
-    reset = payload.get("reset", False) if payload else False
-    if reset:
-        print("[+] Resetting matches collection...")
-        matches.delete_many({})
+PAIR_PROJECTION = {"host": 1, "timestamp": 1, "message": 1, "software": 1, "version": 1}
 
-    # Process all logs (removed limit)
-    cursor = logs.find()
-    processed = 0
-    new_matches = 0
-    new_cves_stored = 0
-    
-    for log in cursor:
-        processed += 1
+def pair_logs(sw, ver):
+    """
+    Stream the logs of one non-kernel pair (software_version index). Every
+    log is re-checked with extract_software_version(), so a log whose
+    message names a kernel version stays with its kernel pair.
+    """
+    for log in logs.find({"software": sw, "version": ver}, PAIR_PROJECTION):
+        if extract_software_version(log) == (sw, ver):
+            yield log
+
+def kernel_logs(versions):
+    """
+    Stream (version, log) for every linux_kernel pair in `versions` in one
+    pass. Kernel versions come from message text, which no index covers,
+    so all kernel pairs share one regex scan instead of one scan each.
+    """
+    query = {"$or": [{"software": "linux_kernel", "version": {"$in": list(versions)}},
+                     {"message": KERNEL_REGEX}]}
+    for log in logs.find(query, PAIR_PROJECTION):
+        sw, ver = extract_software_version(log)
+        if sw == "linux_kernel" and ver in versions:
+            yield ver, log
+
+def match_grouped():
+    """
+    Resolve CVEs once per distinct (software, version) pair, then fan the
+    matches out to that pair's logs with unordered bulk upserts. Cost grows
+    with the inventory size, not the log volume.
+    """
+    stats = {"processed": 0, "pairs": 0, "matched_pairs": 0, "matches": 0, "new_cves": 0}
+    groups = list(logs.aggregate(inventory_pipeline(), allowDiskUse=True))
+    stats["processed"] = sum(g["logs"] for g in groups)
+    print(f"[+] {stats['processed']} logs -> {len(groups)} distinct software/version pairs")
+
+    groups = [g for g in groups if _usable(g["_id"].get("software"), g["_id"].get("version"))]
+    pairs = [(g["_id"]["software"], g["_id"]["version"]) for g in groups]
+    stats["pairs"] = len(pairs)
+    if CVE_INDEX is None:
+        # NVD lookups for uncached pairs run concurrently within the client's quota
+        resolved = get_client().map(lambda pair: resolve_cves(*pair), pairs)
+    else:
+        resolved = [resolve_cves(sw, ver) for sw, ver in pairs]
+
+    matched = []  # (group, sw, ver, cve_list)
+    for g, (sw, ver), (cve_list, stored) in zip(groups, pairs, resolved):
+        stats["new_cves"] += stored
+        if cve_list:
+            matched.append((g, sw, ver, cve_list))
+    stats["matched_pairs"] = len(matched)
+
+    ops = []
+    fanned = {}
+
+    def fan_out(log, sw, ver, cve_list):
+        nonlocal ops
+        fanned[(sw, ver)] = fanned.get((sw, ver), 0) + 1
+        for cve in cve_list:
+            doc = match_doc(log, sw, ver, cve)
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": doc}, upsert=True))
+        if len(ops) >= MATCH_BULK_SIZE:
+            matches.bulk_write(ops, ordered=False)
+            ops = []
+
+    kernel = {ver: cve_list for _, sw, ver, cve_list in matched if sw == "linux_kernel"}
+    for _, sw, ver, cve_list in matched:
+        if sw != "linux_kernel":
+            for log in pair_logs(sw, ver):
+                fan_out(log, sw, ver, cve_list)
+    if kernel:
+        for ver, log in kernel_logs(kernel):
+            fan_out(log, "linux_kernel", ver, kernel[ver])
+    if ops:
+        matches.bulk_write(ops, ordered=False)
+
+    for g, sw, ver, cve_list in matched:
+        n = fanned.get((sw, ver), 0)
+        stats["matches"] += n * len(cve_list)
+        for cve in cve_list:
+            print(f"[MATCH] {sw} {ver} -> {cve['cve_id']} ({cve['severity']}) x {n} log(s) on {len(g['hosts'])} host(s)")
+    return stats
+
+# ----------------------------
+# PER-LOG MATCHING
+# ----------------------------
+def match_per_log():
+    """Original mode: one pass over every log, one upsert per (log, CVE)."""
+    stats = {"processed": 0, "matches": 0, "new_cves": 0}
+    for log in logs.find():
+        stats["processed"] += 1
         sw, ver = extract_software_version(log)
         
         if not sw or not ver:
             continue
-            
-        # Construct query key
-        query_key = f"{sw} {ver}"
-        
-        # Check Cache
-        if query_key in CVE_CACHE:
-            cve_list = CVE_CACHE[query_key]
-        else:
-            # Query API
-            # Sleep slightly to be nice to API if not cached
-            time.sleep(0.5) 
-            cve_list = query_nvd_cves(query_key, limit=5) # Limit 5 matches per software to save space/time
-            CVE_CACHE[query_key] = cve_list
-            
-            # Store fetched CVEs in database for frontend visibility
-            for cve in cve_list:
-                # Upsert to avoid duplicates
-                res = cves_col.update_one(
-                    {"cve_id": cve["cve_id"]},
-                    {"$set": {
-                        "cve_id": cve["cve_id"],
-                        "description": cve["description"],
-                        "cvss_score": cve["cvss_score"],
-                        "severity": cve["severity"],
-                        "last_updated": datetime.utcnow(),
-                        "source": "NVD_API"
-                    }},
-                    upsert=True
-                )
-                if res.upserted_id:
-                    new_cves_stored += 1
+
+        cve_list, stored = resolve_cves(sw, ver)
+        stats["new_cves"] += stored
 
         # Record Matches
         for cve in cve_list:
-            match_id = f"{log['_id']}__{cve['cve_id']}"
-            
             # Upsert match to prevent DuplicateKeyError (race conditions with scheduler)
-            matches.update_one(
-                {"_id": match_id},
-                {"$set": {
-                    "_id": match_id,
-                    "matched_at": datetime.utcnow(),
-                    "log_id": str(log["_id"]),
-                    "host": log.get("host"),
-                    "timestamp": log.get("timestamp"),
-                    "software": sw,
-                    "version": ver,
-                    "cve_id": cve["cve_id"],
-                    "severity": cve["severity"],
-                    "cvss_score": cve["cvss_score"],
-                    "description": cve["description"],
-                    "message": log.get("message")
-                }},
-                upsert=True
-            )
+            doc = match_doc(log, sw, ver, cve)
+            matches.update_one({"_id": doc["_id"]}, {"$set": doc}, upsert=True)
             print(f"[MATCH] {sw} {ver} -> {cve['cve_id']} ({cve['severity']})")
-            new_matches += 1
+            stats["matches"] += 1
+    return stats
+
+# ----------------------------
+# MATCHING LOGIC
+# ----------------------------
+def load_index(source):
+    """Build the local CVE index, or return None for the NVD API path."""
+    if source != "local":
+        return None
+    t0 = time.perf_counter()
+    index = CVEIndex.build(cves_col)
+    stats = index.stats()
+    print(f"[+] Local CVE index: {stats['cves']} CVEs over {stats['products']} products "
+          f"({stats['skipped']} without version ranges) in {time.perf_counter() - t0:.2f}s")
+    if not len(index):
+        print("[WARN] cve_database has no CVEs with product/version ranges; falling back to the NVD API.")
+        return None
+    return index
+
+def main(payload=None):
+    global CVE_INDEX
+    payload = payload or {}
+    mode = payload.get("mode", MATCH_MODE)
+    source = payload.get("source", MATCH_SOURCE)
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown matching mode '{mode}' (choose from {', '.join(MATCH_MODES)})")
+    if source not in MATCH_SOURCES:
+        raise ValueError(f"Unknown CVE source '{source}' (choose from {', '.join(MATCH_SOURCES)})")
+    print("\n[+] Starting Vulnerability Matching...")
+    CVE_INDEX = load_index(source)
+    source = "local" if CVE_INDEX is not None else "nvd"
+    print(f"[+] Mode: {mode}, CVE source: {source}")
+
+    # Reset if requested
+    reset = payload.get("reset", False)
+    if reset:
+        print("[+] Resetting matches collection...")
+        matches.delete_many({})
+
+    stats = match_grouped() if mode == "grouped" else match_per_log()
 
     print(f"\n[✓] Matching Completed")
-    print(f"Processed: {processed}")
-    print(f"New Matches: {new_matches}")
-    print(f"New CVEs Stored: {new_cves_stored}")
-    print(f"Unique Software/Versions Queried: {len(CVE_CACHE)}")
+    print(f"Processed: {stats['processed']}")
+    print(f"New Matches: {stats['matches']}")
+    print(f"New CVEs Stored: {stats['new_cves']}")
+    if CVE_INDEX is not None:
+        print(f"Unique Software/Versions Queried: {CVE_INDEX.stats()['lookups']}")
+    else:
+        cache = CVE_CACHE.stats()
+        stats["cache"] = cache
+        print(f"Unique Software/Versions Queried: {cache['misses']}")
+        print(f"CVE Cache: {cache['memory_hits']} memory hit(s), {cache['store_hits']} shared hit(s), "
+              f"{cache['misses']} miss(es), {cache['evictions']} eviction(s), hit rate {cache['hit_rate']}")
     
-    return {"status": "completed", "matches": new_matches}
+    return {"status": "completed", "mode": mode, "source": source, "matches": stats["matches"], "stats": stats}
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,240 @@
+"""
+Background bulk writer for the ingestion pipeline.
+
+The parsing thread calls add() for every normalized document. Full batches go
+onto a bounded queue and one or more writer threads drain it with unordered
+insert_many() calls, so parsing keeps going while a batch is on the wire.
+
+With a DuplicateFilter (parser_engine.dedup) each batch is screened before
+insert_many(), so known duplicates never reach the server; they are counted
+in `prefiltered` and included in `duplicates`.
+
+stats() reports per-stage timings:
+  - produce_seconds : time the producer spent parsing/normalizing
+  - stall_seconds   : time the producer was blocked on a full queue
+  - write_seconds   : summed insert_many() time across writer threads
+  - peak_rss_mb     : highest current RSS seen after a batch write while this
+                      writer ran (/proc/self/statm; elsewhere the process-
+                      lifetime ru_maxrss, which never goes down)
+"""
+
+import os
+import queue
+import threading
+import time
+from pymongo.errors import BulkWriteError
+from parser_engine.records import NormalizedLog
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_STOP = object()
+
+
+class BulkWriter:
+    def __init__(self, collection, batch_size=1000, queue_depth=8, writers=1, dedup=None, storage=None):
+        self.collection = collection
+        self.dedup = dedup
+        self.storage = storage
+        self.batch_size = max(1, int(batch_size))
+        self._queue = queue.Queue(maxsize=max(1, int(queue_depth)))
+        self._batch = []
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._closed_at = None
+
+        # counters
+        self.produced = 0
+        self.batches = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.prefiltered = 0
+        self.errors = 0
+        self.stall_seconds = 0.0
+        self.write_seconds = 0.0
+        self.peak_rss_mb = 0.0
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"bulk-writer-{i}", daemon=True)
+            for i in range(max(1, int(writers)))
+        ]
+        for t in self._threads:
+            t.start()
+
+    # --------------------------------------------------------
+    # PRODUCER SIDE
+    # --------------------------------------------------------
+    def add(self, doc):
+        self._batch.append(doc)
+        self.produced += 1
+        if len(self._batch) >= self.batch_size:
+            self._submit(self._batch)
+            self._batch = []
+
+    def _submit(self, batch):
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            t0 = time.perf_counter()
+            self._queue.put(batch)
+            self.stall_seconds += time.perf_counter() - t0
+
+    def close(self):
+        """Flush the partial batch, stop the writers and return stats()."""
+        if self._batch:
+            self._submit(self._batch)
+            self._batch = []
+        produce_end = time.perf_counter()
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._closed_at = time.perf_counter()
+        self._produce_seconds = produce_end - self._started - self.stall_seconds
+        return self.stats()
+
+    # --------------------------------------------------------
+    # WRITER SIDE
+    # --------------------------------------------------------
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is _STOP:
+                break
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Keep draining: a dead writer would block the producer on put()
+                with self._lock:
+                    self.errors += len(batch)
+                    self.batches += 1
+                print(f"[WARN] Batch write failed, {len(batch)} record(s) dropped: {e}")
+
+    def _write(self, batch):
+        t0 = time.perf_counter()
+        if batch and isinstance(batch[0], NormalizedLog):
+            # Compact mode: build the BSON-ready dicts only now
+            batch = [rec.to_document() for rec in batch]
+        prefiltered = 0
+        if self.dedup is not None:
+            batch, prefiltered = self.dedup.filter(batch)
+        inserted, duplicates, errors = insert_batch(self.collection, batch, self.storage) if batch else (0, 0, 0)
+        if self.dedup is not None and batch and not errors:
+            self.dedup.remember(d["_id"] for d in batch)
+        elapsed = time.perf_counter() - t0
+
+        with self._lock:
+            before = self.inserted
+            self.inserted += inserted
+            self.duplicates += duplicates + prefiltered
+            self.prefiltered += prefiltered
+            self.errors += errors
+            self.batches += 1
+            self.write_seconds += elapsed
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+            if self.inserted // 10000 > before // 10000:
+                print(f"[STATUS] Ingested {self.inserted} logs...")
+
+    # --------------------------------------------------------
+    # REPORTING
+    # --------------------------------------------------------
+    def stats(self):
+        end = self._closed_at or time.perf_counter()
+        produce = getattr(self, "_produce_seconds", end - self._started - self.stall_seconds)
+        return {
+            "produced": self.produced,
+            "batches": self.batches,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "prefiltered": self.prefiltered,
+            "errors": self.errors,
+            "wall_seconds": round(end - self._started, 4),
+            "produce_seconds": round(produce, 4),
+            "stall_seconds": round(self.stall_seconds, 4),
+            "write_seconds": round(self.write_seconds, 4),
+            "peak_rss_mb": round(max(self.peak_rss_mb, current_rss_mb()), 1),
+        }
+
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss_mb():
+    """
+    Resident set size of this process right now, in MB. Falls back to the
+    process-lifetime peak where /proc is missing (0.0 if neither works).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0.0
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def insert_batch(collection, batch, storage=None):
+    """
+    Unordered insert_many() of one batch; duplicate _ids are not errors.
+    With a LogStorage (parser_engine.storage) the batch is shaped for the
+    storage mode first and the documents that landed are passed to its
+    on_inserted() hook.
+    Returns (inserted, duplicates, errors).
+    """
+    inserted = 0
+    duplicates = 0
+    errors = 0
+    failed = ()
+    if storage is not None:
+        batch = storage.prepare_batch(batch)
+    try:
+        collection.insert_many(batch, ordered=False)
+        inserted = len(batch)
+    except BulkWriteError as e:
+        details = e.details or {}
+        inserted = details.get("nInserted", 0)
+        failed = {err.get("index") for err in details.get("writeErrors", [])}
+        for err in details.get("writeErrors", []):
+            if err.get("code") == 11000:
+                duplicates += 1
+            else:
+                errors += 1
+        if errors:
+            print(f"[WARN] Batch insert error: {errors} non-duplicate write error(s)")
+    except Exception as e:
+        errors = len(batch)
+        print(f"[WARN] Batch insert error: {e}")
+        return inserted, duplicates, errors
+
+    if storage is not None and inserted:
+        landed = [d for i, d in enumerate(batch) if i not in failed] if failed else batch
+        try:
+            storage.on_inserted(landed)
+        except Exception as e:
+            print(f"[WARN] Storage post-insert hook failed: {e}")
+    return inserted, duplicates, errors
+
+
+def summarize(stats_list):
+    """Roll up several stats() dicts and add per-stage throughput (docs/sec)."""
+    keys = ("produced", "batches", "inserted", "duplicates", "prefiltered", "errors",
+            "wall_seconds", "produce_seconds", "stall_seconds", "write_seconds")
+    total = {k: 0 for k in keys}
+    for s in stats_list:
+        for k in keys:
+            total[k] += s.get(k, 0)
+    for k in ("wall_seconds", "produce_seconds", "stall_seconds", "write_seconds"):
+        total[k] = round(total[k], 4)
+    # RSS does not add up across workers; report the largest sample
+    total["peak_rss_mb"] = max((s.get("peak_rss_mb", 0.0) for s in stats_list), default=0.0)
+
+    total["parse_rate"] = round(total["produced"] / total["produce_seconds"], 1) if total["produce_seconds"] else 0.0
+    total["write_rate"] = round(total["inserted"] / total["write_seconds"], 1) if total["write_seconds"] else 0.0
+    return total
@@ -0,0 +1,124 @@
+"""
+Per-file ingestion checkpoints.
+
+Each dataset file gets one document in the `ingest_checkpoints` collection:
+    {_id: <abs path>, inode, size, offset, head_hash, head_len, updated_at}
+
+On the next run ingestion resumes at `offset`, unless the file was rotated
+(inode or head bytes changed) or truncated (size < offset), in which case it
+starts again from byte 0.
+
+For compressed files `offset` counts decompressed bytes while `size` is the
+on-disk (compressed) size: an unchanged size means nothing new to read, a
+grown file (e.g. an appended gzip member) resumes at `offset`, a shrunken one
+starts over.
+"""
+
+import os
+import time
+from datetime import datetime
+from hashlib import blake2b
+
+# Bytes hashed at the start of a file to detect "same path, new content"
+HEAD_BYTES = 1024
+# A trailing line without '\n' is only consumed once the file has been idle
+# this long; otherwise it is left for the next run (writer may still append).
+SETTLE_SECONDS = int(os.environ.get("INGEST_SETTLE_SECONDS", "60"))
+
+
+# ------------------------------------------------------------
+# FILE FINGERPRINT
+# ------------------------------------------------------------
+def head_hash(path, length=HEAD_BYTES):
+    with open(path, "rb") as f:
+        return blake2b(f.read(length), digest_size=16).hexdigest()
+
+
+def fingerprint(path):
+    st = os.stat(path)
+    head_len = min(HEAD_BYTES, st.st_size)
+    return {
+        "inode": st.st_ino,
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "head_len": head_len,
+        "head_hash": head_hash(path, head_len),
+    }
+
+
+def complete_end(path, size, mtime, settle_seconds=SETTLE_SECONDS):
+    """
+    Return the byte offset just past the last complete line.
+    If the file has been idle for `settle_seconds`, a final unterminated line
+    counts as complete.
+    """
+    if size == 0:
+        return 0
+    if time.time() - mtime >= settle_seconds:
+        return size
+
+    block = 64 * 1024
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            read_from = max(0, pos - block)
+            f.seek(read_from)
+            chunk = f.read(pos - read_from)
+            idx = chunk.rfind(b"\n")
+            if idx != -1:
+                return read_from + idx + 1
+            pos = read_from
+    return 0
+
+
+# ------------------------------------------------------------
+# CHECKPOINT STORE
+# ------------------------------------------------------------
+class CheckpointStore:
+    def __init__(self, col):
+        self.col = col
+
+    def load(self, path):
+        return self.col.find_one({"_id": os.path.abspath(path)})
+
+    def resume_offset(self, path, fp, compressed=False):
+        """
+        Return (offset, reason) for `path` given its current fingerprint.
+        reason is one of: new, resume, unchanged, rotated, truncated.
+        """
+        cp = self.load(path)
+        if not cp:
+            return 0, "new"
+        if cp.get("inode") != fp["inode"]:
+            return 0, "rotated"
+        if fp["size"] < (cp.get("size", 0) if compressed else cp.get("offset", 0)):
+            return 0, "truncated"
+
+        # Compare the same number of head bytes that were hashed last time
+        old_len = cp.get("head_len", 0)
+        current = fp["head_hash"] if old_len == fp["head_len"] else head_hash(path, old_len)
+        if current != cp.get("head_hash"):
+            return 0, "rotated"
+
+        if compressed and fp["size"] == cp.get("size"):
+            return cp.get("offset", 0), "unchanged"
+        return cp.get("offset", 0), "resume"
+
+    def commit(self, path, fp, offset):
+        path = os.path.abspath(path)
+        self.col.update_one(
+            {"_id": path},
+            {"$set": {
+                "path": path,
+                "inode": fp["inode"],
+                "size": fp["size"],
+                "offset": offset,
+                "head_hash": fp["head_hash"],
+                "head_len": fp["head_len"],
+                "updated_at": datetime.utcnow(),
+            }},
+            upsert=True
+        )
+
+    def clear(self):
+        self.col.delete_many({})
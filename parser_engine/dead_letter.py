@@ -0,0 +1,154 @@
+"""
+Dead-letter sink for records that could not be parsed or normalized.
+
+Each rejected record becomes one JSON line in an append-only file:
+    {"ts", "source", "stage", "error", "detail", "raw"}
+stage is "parse" (reader could not decode the line), "normalize" or
+"validate" (normalized but failed parser_engine.validate.validate_batch).
+
+offer() only does a put_nowait() onto a bounded queue; a background thread
+drains it in batches and writes them with one write() call, so the ingest loop
+never waits on disk. When the queue is full the record is counted as dropped
+instead. The file rotates at INGEST_DEAD_LETTER_MAX_BYTES, keeping
+INGEST_DEAD_LETTER_BACKUPS old files (dead_letter.jsonl.1, .2, ...).
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+from parser_engine.dedup import STATE_DIR
+
+DEAD_LETTER_ENABLED = os.environ.get("INGEST_DEAD_LETTER", "1") == "1"
+DEAD_LETTER_DIR = os.environ.get("INGEST_DEAD_LETTER_DIR", os.path.join(STATE_DIR, "dead_letter"))
+DEAD_LETTER_MAX_BYTES = int(os.environ.get("INGEST_DEAD_LETTER_MAX_BYTES", str(50 * 1024 * 1024)))
+DEAD_LETTER_BACKUPS = int(os.environ.get("INGEST_DEAD_LETTER_BACKUPS", "5"))
+DEAD_LETTER_QUEUE = int(os.environ.get("INGEST_DEAD_LETTER_QUEUE", "10000"))
+# Raw payloads longer than this are cut in the dead-letter file
+DEAD_LETTER_RAW_LIMIT = 16 * 1024
+
+_STOP = object()
+
+
+class DeadLetterSink:
+    def __init__(self, path, max_bytes=DEAD_LETTER_MAX_BYTES, backups=DEAD_LETTER_BACKUPS,
+                 queue_size=DEAD_LETTER_QUEUE, batch_size=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._thread = threading.Thread(target=self._run, name="dead-letter", daemon=True)
+        self._thread.start()
+
+    def offer(self, raw, source, exc, stage="normalize"):
+        """Queue one rejected record. Never blocks; returns False if dropped."""
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", errors="replace")
+        elif raw is not None and not isinstance(raw, str):
+            raw = json.dumps(raw, default=str)
+        entry = {
+            "ts": datetime.utcnow().isoformat(),
+            "source": source,
+            "stage": stage,
+            "error": type(exc).__name__ if isinstance(exc, BaseException) else str(exc),
+            "detail": str(exc)[:500] if isinstance(exc, BaseException) else "",
+            "raw": (raw or "")[:DEAD_LETTER_RAW_LIMIT].rstrip("\n"),
+        }
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    # --------------------------------------------------------
+    # WRITER THREAD
+    # --------------------------------------------------------
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stop = True
+                batch = [e for e in batch if e is not _STOP]
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in batch).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.written += len(batch)
+        except OSError as e:
+            self.write_errors += len(batch)
+            print(f"[WARN] Dead-letter write failed: {e}")
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self):
+        """Flush queued records and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        return self.stats()
+
+    def stats(self):
+        return {"path": self.path, "written": self.written, "dropped": self.dropped,
+                "write_errors": self.write_errors}
+
+
+def dead_letter_path(worker=False):
+    """Worker processes get their own file so rotation never races."""
+    name = f"dead_letter-{os.getpid()}.jsonl" if worker else "dead_letter.jsonl"
+    return os.path.join(DEAD_LETTER_DIR, name)
+
+
+# ------------------------------------------------------------
+# PER-SOURCE COUNTERS
+# ------------------------------------------------------------
+COUNTER_KEYS = ("parsed", "normalized", "rejected", "dead_lettered")
+
+
+class SourceMetrics:
+    """parsed / normalized / rejected / dead_lettered counts per source."""
+    def __init__(self):
+        self.sources = {}
+
+    def get(self, source):
+        counters = self.sources.get(source)
+        if counters is None:
+            counters = self.sources[source] = dict.fromkeys(COUNTER_KEYS, 0)
+        return counters
+
+    def merge(self, other):
+        """Add another SourceMetrics (or its as_dict()) into this one."""
+        sources = other.sources if isinstance(other, SourceMetrics) else other
+        for source, counters in sources.items():
+            mine = self.get(source)
+            for k in COUNTER_KEYS:
+                mine[k] += counters.get(k, 0)
+
+    def as_dict(self):
+        return {s: dict(c) for s, c in self.sources.items()}
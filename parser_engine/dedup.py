@@ -0,0 +1,318 @@
+"""
+Pre-insert duplicate filter for normalized_logs.
+
+Re-running ingestion over the same data used to send every batch to Mongo
+only to have it rejected with E11000. DuplicateFilter drops known duplicates
+before the network call:
+
+    exact LRU     : bounded set of _ids known to be in the collection; a hit
+                    is a duplicate, no query needed
+    Bloom filter  : scalable Bloom filter of every _id seen; a miss is
+                    definitely new, a hit is only "maybe" and is confirmed
+                    with one batched {_id: {$in: [...]}} query per batch
+
+Bloom false positives cost a lookup, never a lost record. The filter is
+seeded from the most recent _ids in the collection and the Bloom part is
+saved under INGEST_STATE_DIR between runs. Worker processes each return
+their filter and the parent ORs them together (merge()).
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+DEDUP_ENABLED = os.environ.get("INGEST_DEDUP", "1") == "1"
+DEDUP_CAPACITY = int(os.environ.get("INGEST_DEDUP_CAPACITY", "1000000"))
+DEDUP_ERROR_RATE = float(os.environ.get("INGEST_DEDUP_ERROR_RATE", "0.01"))
+DEDUP_LRU_SIZE = int(os.environ.get("INGEST_DEDUP_LRU", "200000"))
+DEDUP_SEED = int(os.environ.get("INGEST_DEDUP_SEED", "100000"))
+# Long-running push inputs save the Bloom state at most this often
+DEDUP_SAVE_SECONDS = float(os.environ.get("INGEST_DEDUP_SAVE_SECONDS", "60"))
+STATE_DIR = os.environ.get(
+    "INGEST_STATE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".ingest_state")),
+)
+
+
+def _hashes(key):
+    """Two 64-bit hashes for double hashing. Hex IDs are already uniform."""
+    if isinstance(key, str) and len(key) >= 32:
+        try:
+            return int(key[:16], 16), int(key[16:32], 16) | 1
+        except ValueError:
+            pass
+    digest = blake2b(str(key).encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+
+
+def _popcount(data):
+    return bin(int.from_bytes(data, "big")).count("1") if data else 0
+
+
+# ------------------------------------------------------------
+# BLOOM FILTERS
+# ------------------------------------------------------------
+class BloomFilter:
+    def __init__(self, capacity, error_rate, bits=None, count=0):
+        self.capacity = int(capacity)
+        self.error_rate = error_rate
+        self.m = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.k = max(1, int(round(self.m / capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.m + 7) // 8)
+        self.count = count
+
+    def _positions(self, key):
+        h1, h2 = _hashes(key)
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, key):
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        for p in self._positions(key):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def estimate_count(self):
+        """Estimate the number of keys from the fill ratio (used after merge)."""
+        ones = _popcount(self.bits)
+        if ones >= self.m:
+            return self.capacity
+        return int(-self.m / self.k * math.log(1 - ones / self.m))
+
+    def same_shape(self, other):
+        return self.m == other.m and self.k == other.k
+
+
+class ScalableBloomFilter:
+    """
+    Adds a new, larger and tighter slice whenever the current one is full, so
+    the false-positive rate stays bounded without knowing the size up front.
+    """
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, capacity=DEDUP_CAPACITY, error_rate=DEDUP_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filters = [BloomFilter(capacity, error_rate * (1 - self.TIGHTENING))]
+
+    def add(self, key):
+        last = self.filters[-1]
+        if last.full:
+            last = BloomFilter(last.capacity * self.GROWTH, last.error_rate * self.TIGHTENING)
+            self.filters.append(last)
+        last.add(key)
+
+    def __contains__(self, key):
+        return any(key in f for f in reversed(self.filters))
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def merge(self, other):
+        """OR `other` into this filter slice by slice."""
+        for i, f in enumerate(other.filters):
+            if i < len(self.filters) and self.filters[i].same_shape(f):
+                mine = self.filters[i]
+                mine.bits = bytearray(a | b for a, b in zip(mine.bits, f.bits))
+                mine.count = mine.estimate_count()
+            else:
+                self.filters.append(BloomFilter(f.capacity, f.error_rate, bytearray(f.bits), f.count))
+
+    # --------------------------------------------------------
+    # SERIALIZATION: one JSON header line, then the slices' bits
+    # --------------------------------------------------------
+    def dumps(self):
+        header = {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "filters": [{"capacity": f.capacity, "error_rate": f.error_rate, "count": f.count}
+                        for f in self.filters],
+        }
+        return json.dumps(header).encode() + b"\n" + b"".join(bytes(f.bits) for f in self.filters)
+
+    @classmethod
+    def loads(cls, data):
+        header, _, body = data.partition(b"\n")
+        header = json.loads(header)
+        sbf = cls(header["capacity"], header["error_rate"])
+        sbf.filters = []
+        pos = 0
+        for meta in header["filters"]:
+            f = BloomFilter(meta["capacity"], meta["error_rate"], count=meta["count"])
+            size = len(f.bits)
+            f.bits = bytearray(body[pos:pos + size])
+            if len(f.bits) != size:
+                raise ValueError("truncated bloom filter state")
+            pos += size
+            sbf.filters.append(f)
+        return sbf
+
+
+# ------------------------------------------------------------
+# EXACT LRU
+# ------------------------------------------------------------
+class LRUSet:
+    def __init__(self, maxsize=DEDUP_LRU_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __contains__(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            return True
+        return False
+
+    def add(self, key):
+        self._data[key] = None
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# ------------------------------------------------------------
+# DUPLICATE FILTER
+# ------------------------------------------------------------
+class DuplicateFilter:
+    def __init__(self, collection, bloom=None, lru_size=DEDUP_LRU_SIZE):
+        self.collection = collection
+        self.bloom = bloom or ScalableBloomFilter()
+        self.lru = LRUSet(lru_size)
+        self._lock = threading.Lock()
+        self.lru_hits = 0
+        self.confirmed = 0
+        self.false_positives = 0
+        self.queries = 0
+
+    def seed(self, limit=DEDUP_SEED):
+        """Load the most recently inserted _ids as known duplicates."""
+        if limit <= 0:
+            return 0
+        n = 0
+        try:
+            for d in self.collection.find({}, {"_id": 1}).sort("$natural", -1).limit(limit):
+                self.lru.add(d["_id"])
+                if d["_id"] not in self.bloom:
+                    self.bloom.add(d["_id"])
+                n += 1
+        except Exception as e:
+            print(f"[WARN] Could not seed duplicate filter: {e}")
+        return n
+
+    def filter(self, docs):
+        """
+        Split a batch into (new_docs, duplicate_count). Called from writer
+        threads; the confirmation query runs outside the lock.
+        """
+        new, maybe = [], []
+        duplicates = 0
+        with self._lock:
+            in_batch = set()
+            for doc in docs:
+                _id = doc["_id"]
+                if _id in in_batch:
+                    duplicates += 1
+                    continue
+                in_batch.add(_id)
+                if _id in self.lru:
+                    self.lru_hits += 1
+                    duplicates += 1
+                elif _id in self.bloom:
+                    maybe.append(doc)
+                else:
+                    self.bloom.add(_id)
+                    new.append(doc)
+
+        if maybe:
+            try:
+                existing = {d["_id"] for d in self.collection.find(
+                    {"_id": {"$in": [d["_id"] for d in maybe]}}, {"_id": 1})}
+            except Exception as e:
+                # Let insert_many() sort it out via E11000
+                print(f"[WARN] Duplicate confirmation query failed: {e}")
+                existing = set()
+            with self._lock:
+                self.queries += 1
+                for doc in maybe:
+                    if doc["_id"] in existing:
+                        self.lru.add(doc["_id"])
+                        duplicates += 1
+                    else:
+                        new.append(doc)
+                self.confirmed += len(existing)
+                self.false_positives += len(maybe) - len(existing)
+        return new, duplicates
+
+    def remember(self, ids):
+        """Record _ids that are now known to be stored."""
+        with self._lock:
+            for _id in ids:
+                self.lru.add(_id)
+
+    def stats(self):
+        return {
+            "bloom_keys": len(self.bloom),
+            "bloom_slices": len(self.bloom.filters),
+            "lru_size": len(self.lru),
+            "lru_hits": self.lru_hits,
+            "bloom_confirmed": self.confirmed,
+            "bloom_false_positives": self.false_positives,
+            "confirm_queries": self.queries,
+        }
+
+
+# ------------------------------------------------------------
+# PERSISTENCE
+# ------------------------------------------------------------
+def state_path(collection):
+    return os.path.join(STATE_DIR, f"dedup_{collection.name}.bloom")
+
+
+def load_filter(collection, seed=DEDUP_SEED):
+    """Build a DuplicateFilter from the saved Bloom state plus recent _ids."""
+    bloom = None
+    path = state_path(collection)
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                bloom = ScalableBloomFilter.loads(f.read())
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable dedup state {path}: {e}")
+    dedup = DuplicateFilter(collection, bloom)
+    dedup.seed(seed)
+    return dedup
+
+
+def save_filter(dedup):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = state_path(dedup.collection)
+    tmp = path + ".tmp"
+    # Writer threads may be adding keys; take a consistent copy
+    with dedup._lock:
+        data = dedup.bloom.dumps()
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def clear_state(collection):
+    path = state_path(collection)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,121 @@
+"""
+Data-driven software/version/CPE enrichment for normalize_soc_log.
+
+Rules live in enrichment_rules.json (override with INGEST_ENRICHMENT_RULES):
+    version_rules.<ruleset> : ordered keyword -> (version, cpe) rules; the
+                              first rule in the list wins when several match
+    raw_rules               : ordered rules classifying unstructured lines by
+                              message keywords (lowercase or case-sensitive)
+                              and source keywords
+
+Every keyword list is compiled once into a single regex, so a record is
+resolved with one scan per field no matter how many products are listed.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+RULES_FILE = os.environ.get(
+    "INGEST_ENRICHMENT_RULES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "enrichment_rules.json"),
+)
+
+
+# ------------------------------------------------------------
+# MULTI-KEYWORD MATCHER
+# ------------------------------------------------------------
+class KeywordMatcher:
+    """
+    Finds which of many keywords occur in a text with one regex scan and
+    returns the lowest (highest-priority) rule index among them.
+    """
+    def __init__(self, keywords):
+        # keywords: list of (keyword, rule_index)
+        self._index = {}
+        for kw, idx in keywords:
+            self._index.setdefault(kw, idx)
+        ordered = sorted(self._index, key=lambda k: (self._index[k], -len(k)))
+        # Lookahead so overlapping keywords are all seen in a single pass
+        self._regex = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))") if ordered else None
+
+    def first(self, text):
+        if self._regex is None or not text:
+            return None
+        best = None
+        for m in self._regex.finditer(text):
+            idx = self._index[m.group(1)]
+            if best is None or idx < best:
+                best = idx
+                if best == 0:
+                    break
+        return best
+
+
+def _min(*vals):
+    vals = [v for v in vals if v is not None]
+    return min(vals) if vals else None
+
+
+# ------------------------------------------------------------
+# RULE TABLE
+# ------------------------------------------------------------
+class EnrichmentTable:
+    def __init__(self, rules):
+        self.version_rules = rules.get("version_rules", {})
+        self._version_matchers = {
+            name: KeywordMatcher([(r["match"].lower(), i) for i, r in enumerate(rs)])
+            for name, rs in self.version_rules.items()
+        }
+
+        self.raw_rules = rules.get("raw_rules", [])
+        self._raw_msg = KeywordMatcher(
+            [(kw.lower(), i) for i, r in enumerate(self.raw_rules) for kw in r.get("message", [])])
+        self._raw_msg_cs = KeywordMatcher(
+            [(kw, i) for i, r in enumerate(self.raw_rules) for kw in r.get("message_cs", [])])
+        self._raw_source = KeywordMatcher(
+            [(kw.lower(), i) for i, r in enumerate(self.raw_rules) for kw in r.get("source", [])])
+
+        self.resolve_version = lru_cache(maxsize=4096)(self._resolve_version)
+        self._source_rule = lru_cache(maxsize=1024)(self._raw_source.first)
+
+    def _resolve_version(self, ruleset, software):
+        """Return (version, cpe) for `software` or (None, None)."""
+        matcher = self._version_matchers.get(ruleset)
+        idx = matcher.first(software.lower()) if matcher and software else None
+        if idx is None:
+            return None, None
+        rule = self.version_rules[ruleset][idx]
+        return rule["version"], rule.get("cpe")
+
+    def classify_raw(self, msg, source):
+        """
+        Return (software, version, event_type, host, cpe) for an unstructured
+        line; msg is lowercased once for all case-insensitive keywords.
+        """
+        idx = _min(
+            self._raw_msg_cs.first(msg),
+            self._raw_msg.first(msg.lower()),
+            self._source_rule(source.lower()),
+        )
+        if idx is None:
+            return "unknown", "N/A", "log", "unknown", None
+        r = self.raw_rules[idx]
+        return r["software"], r["version"], r["event_type"], r["host"], r.get("cpe")
+
+
+def load_table(path=RULES_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return EnrichmentTable(json.load(f))
+
+
+_TABLE = None
+
+
+def get_table():
+    """Load and compile the rule table once per process."""
+    global _TABLE
+    if _TABLE is None:
+        _TABLE = load_table()
+    return _TABLE
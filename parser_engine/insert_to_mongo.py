@@ -1,8 +1,20 @@
 import json
 import os
+import threading
+import time
 from datetime import datetime
 from pymongo import MongoClient
-from hashlib import md5
+from parser_engine.record_id import get_id_strategy, ID_STRATEGY
+from parser_engine.readers import get_reader, iter_lines, open_log_file, compression_of, strip_compression
+from parser_engine.timestamps import parse_timestamp
+from parser_engine.enrichment import get_table
+from parser_engine.checkpoints import CheckpointStore, fingerprint, complete_end
+from parser_engine.bulk_writer import BulkWriter, insert_batch, summarize
+from parser_engine.dedup import DEDUP_ENABLED, DEDUP_SAVE_SECONDS, ScalableBloomFilter, load_filter, save_filter, clear_state
+from parser_engine.records import COMPACT_MODE, NormalizedLog
+from parser_engine.storage import STORAGE_MODE, LogStorage, prepare_storage
+from parser_engine.validate import VALIDATE_ENABLED, InvalidRecord, validate_batch
+from parser_engine.dead_letter import DEAD_LETTER_ENABLED, DEAD_LETTER_DIR, DeadLetterSink, SourceMetrics, dead_letter_path
 
 # ------------------------------------------------------------
 # CONFIG
@@ -19,269 +31,640 @@ client = MongoClient(MONGO_URI)
 db = client[DB_NAME]
 collection = db["normalized_logs"]
 matches_collection = db["vuln_matches"]
+default_make_id = get_id_strategy(ID_STRATEGY)
+enrichment = get_table()
+checkpoints = CheckpointStore(db["ingest_checkpoints"])
 
 # ------------------------------------------------------------
 # NORMALIZATION
 # ------------------------------------------------------------
-import random
-
-def normalize_soc_log(item):
+def normalize_soc_log(item, raw=None, make_id=None):
     """
     Normalize the complex nested SOC log structure to a flat format expected by the system.
-    Supports both standard SOC structure and Sysmon structure.
+    Supports the structured items produced by parser_engine.readers (syslog,
+    registry blocks, Windows Event JSON, firewall JSON) as well as the
+    standard SOC, Sysmon and raw text structures.
     Enriches with dummy versions if missing, for demonstration purposes.
+    `raw` is the source line (bytes) and `make_id` the record ID strategy
+    (see parser_engine.record_id); defaults to the configured strategy.
     """
     try:
-        # --- ALREADY NORMALIZED HANDLER ---
-        # Checks if key fields exist corresponding to OUT_*.jsonl format
-        if "timestamp" in item and "host" in item and "source" in item and "message" in item:
-            # Enforce datetime
-            ts_str = item["timestamp"]
-            try:
-                # Try parsing if string
-                if isinstance(ts_str, str):
-                    if "T" in ts_str:
-                         ts = datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-                    else:
-                         ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                    ts_formatted = ts.strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    ts_formatted = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            except:
-                ts_formatted = ts_str # Assume correct if parsing fails or keep string
-
-            software = item.get("software", "unknown")
-            version = item.get("version", "N/A")
-
-            # DEMO: Enrich version for matching if missing
-            if version == "N/A" or not version:
-                if "ssh" in software.lower(): version = "OpenSSH 7.2p2"
-                elif "nginx" in software.lower(): version = "1.14.0"
-                elif "apache" in software.lower(): version = "2.4.29"
-                elif "sudo" in software.lower(): version = "1.8.21"
-                elif "kernel" in software.lower(): version = "4.4.0"
-                elif "python" in software.lower(): version = "2.7.12"
-                elif "chrome" in software.lower(): version = "100.0.4896.60"
-                elif "firefox" in software.lower(): version = "98.0.1"
-                elif "explorer" in software.lower(): version = "10.0.19041"
-                else: version = "N/A"
-            
-            # Ensure format
-            return {
-                "_id": item.get("_id") or md5(json.dumps(item, sort_keys=True).encode()).hexdigest(),
-                "timestamp": ts_formatted,
-                "host": item["host"],
-                "os": item.get("os", "Unknown"),
-                "software": software,
-                "version": version,
-                "event_type": item.get("event_type", "log"),
-                "message": item["message"],
-                "source": item["source"],
-                "severity": item.get("severity", "info")
-            }
-
-        # --- SYSMON FORMAT HANDLER ---
-        if "EventID" in item and "Computer" in item:
-            # Timestamp: "2025-11-01 00:00:00"
-            ts_str = item.get("TimeCreated", "")
-            try:
-                # Ensure we have a parseable timestamp
-                ts = datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-                ts_formatted = ts.strftime("%Y-%m-%d %H:%M:%S")
-            except:
-                ts_formatted = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            software = item.get("ProcessName", "unknown")
-            version = "N/A"
-            
-            # DEMO: Enrich version for matching
-            if "notepad" in software.lower(): version = "10.0.19041"
-            if "explorer" in software.lower(): version = "10.0.19041"
-            if "chrome" in software.lower(): version = "100.0.4896.60"
-            if "firefox" in software.lower(): version = "98.0.1"
-
-            return {
-                "_id": md5(json.dumps(item, sort_keys=True).encode()).hexdigest(),
-                "timestamp": ts_formatted,
-                "host": item.get("Computer", "unknown"),
-                "os": "Windows",
-                "software": software,
-                "version": version,
-                "event_type": f"EventID {item.get('EventID')}",
-                "message": f"Process: {item.get('ProcessName')} User: {item.get('User')} Cmd: {item.get('CommandLine')}",
-                "source": "sysmon"
-            }
-
-        # --- RAW LOG HANDLER (New Heuristics) ---
-        if "raw_message" in item:
-            msg = item["raw_message"]
-            source = item.get("source", "unknown_log")
-            
-            # Defaults
-            software = "unknown"
-            version = "N/A"
-            event_type = "log"
-            host = "unknown"
-            
-            # 1. Apache/Web Logs
-            if "GET " in msg or "POST " in msg or "http" in source.lower():
-                software = "apache"
-                version = "2.4.49" # Vulnerable to Path Traversal (recent example)
-                event_type = "web_access"
-                host = "web_server_01"
-                
-            # 2. SSH/Auth Logs
-            elif "ssh" in msg.lower() or "auth" in source.lower():
-                software = "sshd"
-                version = "OpenSSH 7.2p2" # Vulnerable to Username Enumeration
-                event_type = "auth"
-                host = "ssh_gateway"
-
-            # 3. DNS Logs
-            elif "dns" in msg.lower() or "query" in msg.lower() or "dns" in source.lower():
-                software = "bind"
-                version = "9.11.4" # Vulnerable version
-                event_type = "dns_query"
-                host = "dns_server"
-                
-            # 4. FTP Logs
-            elif "ftp" in msg.lower() or "file" in msg.lower():
-                software = "vsftpd"
-                version = "2.3.4" # Backdoor vulnerability version
-                event_type = "file_transfer"
-                host = "ftp_server"
-
-            return {
-                "_id": md5(msg.encode()).hexdigest(),
-                "timestamp": item.get("timestamp"),
-                "host": host,
-                "os": "Linux",
-                "software": software,
-                "version": version,
-                "event_type": event_type,
-                "message": msg,
-                "source": source,
-                "severity": "info"
-            }
+        return _normalize(item, raw, make_id)
     except Exception as e:
         # print(f"[WARN] Normalization error: {e}")
         return None
 
+
+class UnrecognizedRecord(ValueError):
+    """No normalization handler matched the record."""
+
+
+def _normalize(item, raw=None, make_id=None):
+    """
+    normalize_soc_log() without the error guard: raises on malformed records
+    so ingestion can dead-letter them with the exception class.
+    """
+    make_id = make_id or default_make_id
+    # --- SYSLOG HANDLER (RFC3164 / RFC5424, split by the syslog reader) ---
+    if item.get("format") == "syslog":
+        msg = item["raw_message"]
+        software, version, event_type, _, cpe = enrichment.classify_raw(msg, item.get("source", ""))
+        if software == "unknown" and item.get("app"):
+            software = item["app"].split("(")[0]
+
+        doc = {
+            "_id": make_id(item, raw),
+            "timestamp": parse_timestamp(item["timestamp"], "syslog") or item["timestamp"],
+            "host": item.get("host") or "unknown",
+            "os": "Linux",
+            "software": software,
+            "version": version,
+            "event_type": event_type,
+            "message": msg,
+            "source": item.get("source", "syslog"),
+            "severity": "info"
+        }
+        if cpe:
+            doc["cpe"] = cpe
+        return doc
+
+    # --- REGISTRY BLOCK HANDLER ---
+    if item.get("format") == "registry":
+        target = f"{item.get('key', '')}\\{item.get('value_name', '')}".rstrip("\\")
+        message = f"{item.get('action') or 'Registry event'}: {target}"
+        if item.get("value_data"):
+            message += f" = {item['value_data']}"
+        if item.get("status"):
+            message += f" [{item['status']}]"
+
+        return {
+            "_id": make_id(item, raw),
+            "timestamp": parse_timestamp(item["timestamp"], "registry") or item["timestamp"],
+            "host": "unknown",
+            "os": "Windows",
+            "software": item.get("channel", "registry").lower(),
+            "version": "N/A",
+            "event_type": f"EventID {item.get('event_id')}",
+            "message": message,
+            "source": "registry",
+            "severity": "high" if item.get("status") == "FAILED" else "info",
+            "user": item.get("user", "")
+        }
+
+    # --- ALREADY NORMALIZED HANDLER ---
+    # Checks if key fields exist corresponding to OUT_*.jsonl format
+    if "timestamp" in item and "host" in item and "source" in item and "message" in item:
+        # Enforce datetime (keep the original value if it cannot be parsed)
+        ts_str = item["timestamp"]
+        ts = parse_timestamp(ts_str, item["source"]) or ts_str
+
+        software = item.get("software", "unknown")
+        version = item.get("version", "N/A")
+
+        # DEMO: Enrich version for matching if missing
+        cpe = None
+        if version == "N/A" or not version:
+            version, cpe = enrichment.resolve_version("normalized", software)
+            version = version or "N/A"
+        
+        # Ensure format
+        doc = {
+            "_id": item.get("_id") or make_id(item, raw),
+            "timestamp": ts,
+            "host": item["host"],
+            "os": item.get("os", "Unknown"),
+            "software": software,
+            "version": version,
+            "event_type": item.get("event_type", "log"),
+            "message": item["message"],
+            "source": item["source"],
+            "severity": item.get("severity", "info")
+        }
+        if cpe:
+            doc["cpe"] = cpe
+        return doc
+
+    # --- SYSMON FORMAT HANDLER ---
+    if "EventID" in item and "Computer" in item:
+        # Timestamp: "2025-11-01 00:00:00"
+        ts = parse_timestamp(item.get("TimeCreated", ""), "sysmon") or datetime.now()
+
+        software = item.get("ProcessName", "unknown")
+        
+        # DEMO: Enrich version for matching
+        version, cpe = enrichment.resolve_version("sysmon", software)
+        version = version or "N/A"
+
+        doc = {
+            "_id": make_id(item, raw),
+            "timestamp": ts,
+            "host": item.get("Computer", "unknown"),
+            "os": "Windows",
+            "software": software,
+            "version": version,
+            "event_type": f"EventID {item.get('EventID')}",
+            "message": f"Process: {item.get('ProcessName')} User: {item.get('User')} Cmd: {item.get('CommandLine')}",
+            "source": "sysmon"
+        }
+        if cpe:
+            doc["cpe"] = cpe
+        return doc
+
+    # --- WINDOWS EVENT (NXLog JSON) HANDLER ---
+    if "EventTime" in item and "Hostname" in item:
+        ts = parse_timestamp(item["EventTime"], "windows_event") or datetime.now()
+
+        software = item.get("Product Name") or item.get("SourceName", "unknown")
+        version = item.get("Product Version")
+        cpe = None
+        if not version:
+            version, cpe = enrichment.resolve_version("normalized", software)
+            version = version or "N/A"
+        # Some events carry no Message; describe them like the sysmon handler does
+        message = item.get("Message") or f"EventID {item.get('EventID')} from {item.get('SourceName', 'unknown')}"
+
+        doc = {
+            "_id": make_id(item, raw),
+            "timestamp": ts,
+            "host": item["Hostname"],
+            "os": "Windows",
+            "software": software,
+            "version": version,
+            "event_type": f"EventID {item.get('EventID')}",
+            "message": message,
+            "source": "windows_event",
+            "severity": str(item.get("Severity", "info")).lower()
+        }
+        if cpe:
+            doc["cpe"] = cpe
+        return doc
+
+    # --- FIREWALL HANDLER ---
+    if item.get("log_type") == "firewall":
+        action = item.get("action") or "UNKNOWN"
+        attack = item.get("attack_type")
+        port = item.get("destination_port")
+        dest = item.get("destination_ip")
+        if port is not None:
+            dest = f"{dest}:{int(port)}"
+        message = f"{action} {item.get('protocol')} {item.get('source_ip')} -> {dest}"
+        if attack:
+            message += f" ({attack})"
+
+        return {
+            "_id": make_id(item, raw),
+            "timestamp": parse_timestamp(item.get("timestamp"), "firewall") or item.get("timestamp"),
+            "host": item.get("destination_ip") or "unknown",
+            "os": "Unknown",
+            "software": "firewall",
+            "version": "N/A",
+            "event_type": attack.lower().replace(" ", "_") if attack else "connection",
+            "message": message,
+            "source": "firewall",
+            "severity": (item.get("severity") or "info").lower()
+        }
+
+    # --- RAW LOG HANDLER (New Heuristics) ---
+    if "raw_message" in item:
+        msg = item["raw_message"]
+        source = item.get("source", "unknown_log")
+        software, version, event_type, host, cpe = enrichment.classify_raw(msg, source)
+
+        doc = {
+            "_id": make_id(item, raw),
+            "timestamp": parse_timestamp(item.get("timestamp"), source) or item.get("timestamp"),
+            "host": host,
+            "os": "Linux",
+            "software": software,
+            "version": version,
+            "event_type": event_type,
+            "message": msg,
+            "source": source,
+            "severity": "info"
+        }
+        if cpe:
+            doc["cpe"] = cpe
+        return doc
+    raise UnrecognizedRecord("no normalization handler matched the record")
+
 # ------------------------------------------------------------
 # STREAMING PARSER
 # ------------------------------------------------------------
-def stream_logs(filepath):
+def stream_logs(filepath, start=0, end=None, with_raw=False, position=None, on_error=None):
     """
-    Streaming parser handling JSON Lines, JSON Array, or Raw Text Logs.
+    Streaming parser: sniffs the file format once (see parser_engine.readers)
+    and yields structured items from the matching reader.
+    `start`/`end` restrict parsing to a byte range of the file so large files
+    can be split across ingestion workers.
+    With `with_raw=True` yields (raw_line_bytes, item) pairs.
+    Compressed files (.gz/.bz2/.xz/.zst) are decompressed as a stream; if a
+    `position` dict is given, position["end_offset"] is set to the
+    decompressed offset reached.
+    Lines the reader cannot decode are passed to on_error(raw, exc).
     """
-    filename = os.path.basename(filepath)
-    is_json = filepath.endswith(".json") or filepath.endswith(".jsonl")
-
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        # If explicitly known as JSON, try JSON parsing
-        if is_json:
-            for line in f:
-                if line.strip():
-                    try:
-                         if line.startswith("<<<<") or line.startswith("====") or line.startswith(">>>>"): continue
-                         yield json.loads(line)
-                    except: pass
-        else:
-            # RAW TEXT LOGS (Bro/Zeek, Syslog, etc)
-            # Yield each line as a generic log structure
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"): continue # Skip comments
-                yield {
-                    "raw_message": line, 
-                    "source": filename,
-                    "timestamp": datetime.now().isoformat() # Placeholder for raw logs
-                }
+    filename = os.path.basename(strip_compression(filepath))
+    reader = get_reader(filepath)
+
+    with open_log_file(filepath) as f:
+        for raw, item in reader.parse(iter_lines(f, start, end), filename, on_error):
+            yield (raw, item) if with_raw else item
+        if position is not None:
+            position["end_offset"] = f.tell() if end is None else end
 
 # ------------------------------------------------------------
-# MAIN
+# INGESTION WORKER
 # ------------------------------------------------------------
 import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+# Pipeline tuning (payload keys override these env defaults)
+BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "1000"))
+INGEST_QUEUE_DEPTH = int(os.environ.get("INGEST_QUEUE_DEPTH", "8"))
+INGEST_WRITERS = int(os.environ.get("INGEST_WRITERS", "2"))
+# Number of worker processes (1 = sequential, in-process ingestion)
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "1"))
+# Files larger than this are split into byte-range chunks when workers > 1
+INGEST_CHUNK_BYTES = int(os.environ.get("INGEST_CHUNK_BYTES", str(64 * 1024 * 1024)))
+
+# Per-process duplicate filter (see parser_engine.dedup), loaded on first use
+_dedup = None
+
+
+def get_dedup():
+    global _dedup
+    if _dedup is None:
+        _dedup = load_filter(collection)
+    return _dedup
+
+
+_dedup_saved_at = time.monotonic()
+_dedup_save_lock = threading.Lock()
+
+
+def save_dedup(force=False):
+    """
+    Persist the process filter for the push inputs, which have no end of run
+    to save at: at most every DEDUP_SAVE_SECONDS, or now with force=True.
+    """
+    global _dedup_saved_at
+    if _dedup is None:
+        return False
+    if not force and time.monotonic() - _dedup_saved_at < DEDUP_SAVE_SECONDS:
+        return False
+    if not _dedup_save_lock.acquire(blocking=force):
+        return False  # another thread is saving
+    try:
+        save_filter(_dedup)
+        _dedup_saved_at = time.monotonic()
+        return True
+    except OSError as e:
+        print(f"[WARN] Could not save duplicate filter state: {e}")
+        return False
+    finally:
+        _dedup_save_lock.release()
+
+
+# Storage mode hooks (see parser_engine.storage); prepared on first use
+_storage = None
+
+
+def get_storage(mode=None):
+    """LogStorage for `mode`; without a mode, the env mode prepared once per process."""
+    global _storage
+    if mode:
+        return LogStorage(db, mode)
+    if _storage is None:
+        _storage = prepare_storage(db, STORAGE_MODE)
+    return _storage
+
+
+# Long-lived dead-letter sink for the push inputs (ingest_items)
+_dead_letter = None
+
+
+def get_dead_letter():
+    global _dead_letter
+    if _dead_letter is None:
+        _dead_letter = DeadLetterSink(dead_letter_path(worker=True))
+    return _dead_letter
 
+
+def _reject(counters, sink, raw, source, exc, stage):
+    counters["rejected"] += 1
+    if sink is not None and sink.offer(raw, source, exc, stage):
+        counters["dead_lettered"] += 1
+
+
+def ingest_file(data_file, start=0, end=None, options=None):
+    """
+    Stream, normalize and bulk-insert one file (or one byte-range chunk of it).
+    Parsing runs on this thread; a BulkWriter drains batches in the background.
+    Runs in the calling process or inside a worker process.
+    Normalized records are checked with validate_batch() one batch at a time;
+    records that fail to parse, normalize or validate go to the dead-letter file.
+    Returns {"file", "processed", "inserted", "duplicates", "end_offset",
+    "pipeline", "sources", "dead_letter"}.
+    """
+    options = options or {}
+    count = 0
+    position = {}
+    source = os.path.basename(strip_compression(data_file))
+    make_id = get_id_strategy(options.get("id_strategy"), source)
+    metrics = SourceMetrics()
+    counters = metrics.get(source)
+    compact = options.get("compact", COMPACT_MODE)
+    sink = (DeadLetterSink(dead_letter_path(options.get("_worker", False)))
+            if options.get("dead_letter", DEAD_LETTER_ENABLED) else None)
+
+    batch_size = options.get("batch_size", BATCH_SIZE)
+    validate = options.get("validate", VALIDATE_ENABLED)
+    pending = []  # (raw, doc) waiting for validate_batch()
+
+    def on_error(raw, exc):
+        _reject(counters, sink, raw, source, exc, "parse")
+
+    def add(doc):
+        writer.add(NormalizedLog.from_document(doc) if compact else doc)
+
+    def flush_pending():
+        masks, reasons = validate_batch([doc for _, doc in pending])
+        for i, (raw, doc) in enumerate(pending):
+            if masks[i]:
+                _reject(counters, sink, raw, source, InvalidRecord(reasons[i]), "validate")
+            else:
+                add(doc)
+        pending.clear()
+
+    writer = BulkWriter(
+        collection,
+        batch_size=batch_size,
+        queue_depth=options.get("queue_depth", INGEST_QUEUE_DEPTH),
+        writers=options.get("writers", INGEST_WRITERS),
+        dedup=get_dedup() if options.get("dedup", DEDUP_ENABLED) else None,
+        storage=get_storage(options.get("storage_mode")),
+    )
+
+    try:
+        for raw, item in stream_logs(data_file, start, end, with_raw=True,
+                                     position=position, on_error=on_error):
+            count += 1
+            try:
+                norm = _normalize(item, raw, make_id)
+            except Exception as e:
+                _reject(counters, sink, raw, source, e, "normalize")
+                continue
+            counters["normalized"] += 1
+            if not validate:
+                add(norm)
+                continue
+            pending.append((raw, norm))
+            if len(pending) >= batch_size:
+                flush_pending()
+        if pending:
+            flush_pending()
+    finally:
+        stats = writer.close()
+        dead_letter = sink.close() if sink is not None else None
+        counters["parsed"] = count
+
+    return {"file": data_file, "processed": count, "inserted": stats["inserted"],
+            "duplicates": stats["duplicates"], "end_offset": position.get("end_offset", end),
+            "pipeline": stats, "sources": metrics.as_dict(), "dead_letter": dead_letter}
+
+
+def ingest_items(pairs, make_id=None):
+    """
+    Normalize and insert one in-memory batch of (raw_bytes, item) pairs.
+    Shared by the push-based inputs (syslog listener, HTTP ingest) that
+    receive records instead of reading files.
+    Returns {"received", "rejected", "dead_lettered", "inserted", "duplicates", "errors"}.
+    """
+    docs = []
+    raws = []
+    received = 0
+    counters = {"rejected": 0, "dead_lettered": 0}
+    sink = get_dead_letter() if DEAD_LETTER_ENABLED else None
+    for raw, item in pairs:
+        received += 1
+        try:
+            docs.append(_normalize(item, raw, make_id))
+            raws.append(raw)
+        except Exception as e:
+            _reject(counters, sink, raw, item.get("source", "push"), e, "normalize")
+    if docs and VALIDATE_ENABLED:
+        masks, reasons = validate_batch(docs)
+        if reasons:
+            for i in reasons:
+                _reject(counters, sink, raws[i], docs[i].get("source", "push"),
+                        InvalidRecord(reasons[i]), "validate")
+            docs = [d for d, mask in zip(docs, masks) if not mask]
+    inserted = duplicates = errors = prefiltered = 0
+    if docs and DEDUP_ENABLED:
+        docs, prefiltered = get_dedup().filter(docs)
+    if docs:
+        inserted, duplicates, errors = insert_batch(collection, docs, get_storage())
+        if DEDUP_ENABLED and not errors:
+            get_dedup().remember(d["_id"] for d in docs)
+            save_dedup()
+    duplicates += prefiltered
+    return {"received": received, "rejected": counters["rejected"],
+            "dead_lettered": counters["dead_lettered"], "inserted": inserted, "duplicates": duplicates, "errors": errors}
+
+
+def _ingest_task(task, options):
+    """
+    Process-pool entry point: task is (data_file, start, end).
+    Ships this worker's Bloom filter back so the parent can merge it.
+    """
+    res = ingest_file(*task, options=dict(options, _worker=True))
+    if _dedup is not None:
+        res["dedup_state"] = _dedup.bloom.dumps()
+    return res
+
+
+def plan_tasks(ranges, workers, chunk_bytes=INGEST_CHUNK_BYTES):
+    """
+    Split (data_file, start, end) ranges into ingestion tasks.
+    With a single worker every range is one task; otherwise ranges larger than
+    `chunk_bytes` are cut into byte chunks (line-aligned by the reader).
+    Multi-line formats (reader.splittable == False) and compressed files
+    (end is None: decompressed length unknown) are never cut.
+    Largest tasks are scheduled first so one big file does not finish last.
+    """
+    tasks = []
+    for data_file, start, end in ranges:
+        if (workers <= 1 or end is None or end - start <= chunk_bytes
+                or not get_reader(data_file).splittable):
+            tasks.append((data_file, start, end))
+            continue
+        for chunk_start in range(start, end, chunk_bytes):
+            tasks.append((data_file, chunk_start, min(chunk_start + chunk_bytes, end)))
+
+    tasks.sort(key=lambda t: (t[2] if t[2] is not None else os.path.getsize(t[0])) - t[1], reverse=True)
+    return tasks
+
+# ------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------
 def main(payload=None):
+    global _dedup
+    payload = payload or {}
+
     # Find all log files in datasets/
     base_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.abspath(os.path.join(base_dir, ".."))
     datasets_dir = os.path.join(project_root, "datasets")
     
-    # Get all log files (.log, .txt, .json, .jsonl)
+    # Get all log files (.log, .txt, .json, .jsonl), plain or compressed
     files = []
     for ext in ["*.log", "*.txt", "*.json", "*.jsonl"]:
-        files.extend(glob.glob(os.path.join(datasets_dir, ext)))
+        for comp in ["", ".gz", ".bz2", ".xz", ".zst"]:
+            files.extend(glob.glob(os.path.join(datasets_dir, ext + comp)))
     
     if not files:
         print(f"[ERR] No .log files found in {datasets_dir}")
         return {"status": "error", "message": "no_files_found"}
 
     # Clear existing data ONLY if requested
-    reset = payload.get("reset", False) if payload else False
+    reset = payload.get("reset", False)
+    storage_mode = payload.get("storage_mode", STORAGE_MODE)
     if reset:
         print("[+] Clearing existing logs and matches...")
-        collection.delete_many({})
+        if storage_mode == "timeseries":
+            collection.drop()  # lets prepare_storage() recreate it as time-series
+        else:
+            collection.delete_many({})
         matches_collection.delete_many({})
         db["alerts"].delete_many({})
+        checkpoints.clear()
+        clear_state(collection)
+        _dedup = None
+        LogStorage(db).clear()
+        # Archived logs would otherwise still show up in find_logs()
+        from archive_engine.parquet_archive import ARCHIVE_DIR, clear_archive
+        try:
+            removed = clear_archive()
+            if removed:
+                print(f"[+] Cleared {removed} archived day partition(s) from {ARCHIVE_DIR}")
+        except OSError as e:
+            print(f"[WARN] Could not clear the log archive {ARCHIVE_DIR}: {e}")
     else:
         print("[+] 'reset' flag not set. Appending new logs (skipping duplicates).")
 
+    workers = max(1, int(payload.get("workers", INGEST_WORKERS)))
+    chunk_bytes = max(1, int(payload.get("chunk_bytes", INGEST_CHUNK_BYTES)))
+    incremental = payload.get("incremental", True)
+    options = {k: int(payload[k]) for k in ("batch_size", "queue_depth", "writers") if k in payload}
+    options["id_strategy"] = payload.get("id_strategy", ID_STRATEGY)
+    options["dedup"] = bool(payload.get("dedup", DEDUP_ENABLED))
+    options["compact"] = bool(payload.get("compact", COMPACT_MODE))
+    options["validate"] = bool(payload.get("validate", VALIDATE_ENABLED))
+    # Create collections/TTL indexes here; workers only get the resolved mode
+    options["storage_mode"] = prepare_storage(db, storage_mode).mode
+    dedup = get_dedup() if options["dedup"] else None
+    get_id_strategy(options["id_strategy"])  # fail fast on a typo
 
-    total_processed = 0
-    total_inserted = 0
-    BATCH_SIZE = 1000
-
+    # Work out the unread byte range of every file from its checkpoint
+    ranges = []
+    per_file = {}
     for data_file in files:
-        print(f"[+] Processing file: {data_file}")
-        count = 0
-        inserted = 0
-        batch = []
+        fp = fingerprint(data_file)
+        compressed = compression_of(data_file) is not None
+        start, reason = checkpoints.resume_offset(data_file, fp, compressed) if incremental else (0, "full")
+        # Decompressed length is unknown up front: read compressed files to EOF
+        end = None if compressed else complete_end(data_file, fp["size"], fp["mtime"])
+        if reason in ("rotated", "truncated"):
+            print(f"[i] {data_file} was {reason}; re-reading from start.")
+        if reason == "unchanged" or (end is not None and start >= end):
+            print(f"[i] No new data in {data_file} (offset {start}).")
+            continue
+        ranges.append((data_file, start, end))
+        per_file[data_file] = {"processed": 0, "inserted": 0, "duplicates": 0, "pending": 0,
+                               "failed": False, "fp": fp, "end": end}
 
-        try:
-            for item in stream_logs(data_file):
-                count += 1
-                norm = normalize_soc_log(item)
-                if norm:
-                    # Convert timestamp to datetime object for MongoDB
-                    try:
-                        norm["timestamp"] = datetime.strptime(norm["timestamp"], "%Y-%m-%d %H:%M:%S")
-                    except:
-                        pass 
-                    
-                    batch.append(norm)
-
-                if len(batch) >= BATCH_SIZE:
-                    try:
-                        collection.insert_many(batch, ordered=False)
-                        inserted += len(batch)
-                        if inserted % 10000 == 0:
-                            print(f"[STATUS] Ingested {inserted} logs...")
-                    except Exception as e:
-                        # Duplicate key errors are common if we re-run, ignore them
-                        if "E11000" not in str(e):
-                            print(f"[WARN] Batch insert error: {e}")
-                    batch = []
-
-            # Insert remaining
-            if batch:
+    tasks = plan_tasks(ranges, workers, chunk_bytes)
+    for data_file, _, _ in tasks:
+        per_file[data_file]["pending"] += 1
+
+    pipeline_stats = []
+    source_metrics = SourceMetrics()
+    dead_letter = {"dir": DEAD_LETTER_DIR, "written": 0, "dropped": 0, "write_errors": 0}
+
+    def _collect(task, res):
+        stats = per_file[task[0]]
+        stats["pending"] -= 1
+        if res is None or res["pipeline"]["errors"]:
+            # Keep the old checkpoint so the range is retried next run
+            stats["failed"] = True
+        if res is not None:
+            state = res.pop("dedup_state", None)
+            if state and dedup is not None:
+                dedup.bloom.merge(ScalableBloomFilter.loads(state))
+            if stats["end"] is None:
+                stats["end"] = res["end_offset"]
+            stats["processed"] += res["processed"]
+            stats["inserted"] += res["inserted"]
+            stats["duplicates"] += res["duplicates"]
+            pipeline_stats.append(res["pipeline"])
+            source_metrics.merge(res.get("sources") or {})
+            for k in ("written", "dropped", "write_errors"):
+                dead_letter[k] += (res.get("dead_letter") or {}).get(k, 0)
+        if stats["pending"] == 0 and not stats["failed"]:
+            # Only advance the checkpoint once every chunk of the file landed
+            checkpoints.commit(task[0], stats["fp"], stats["end"])
+            print(f"    [✓] File complete: {task[0]} Processed: {stats['processed']}, Inserted: {stats['inserted']}")
+
+    if workers == 1:
+        for task in tasks:
+            print(f"[+] Processing file: {task[0]}")
+            try:
+                res = ingest_file(*task, options=options)
+            except Exception as e:
+                print(f"\n[ERR] Ingestion failed for {task[0]}: {e}")
+                res = None
+            _collect(task, res)
+    else:
+        print(f"[+] Parallel ingestion: {len(tasks)} task(s) across {workers} worker process(es)")
+        # spawn (not fork): the backend is multi-threaded and MongoClient is not fork-safe
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = {pool.submit(_ingest_task, task, options): task for task in tasks}
+            for fut in as_completed(futures):
+                task = futures[fut]
                 try:
-                    collection.insert_many(batch, ordered=False)
-                    inserted += len(batch)
+                    res = fut.result()
                 except Exception as e:
-                    if "E11000" not in str(e):
-                        print(f"[WARN] Final batch insert error: {e}")
-
-            print(f"    [✓] File complete. Processed: {count}, Inserted: {inserted}")
-            total_processed += count
-            total_inserted += inserted
+                    print(f"\n[ERR] Ingestion failed for {task[0]} [{task[1]}:{task[2]}]: {e}")
+                    res = None
+                _collect(task, res)
 
-        except Exception as e:
-            print(f"\n[ERR] Ingestion failed for {data_file}: {e}")
+    total_processed = sum(s["processed"] for s in per_file.values())
+    total_inserted = sum(s["inserted"] for s in per_file.values())
+    total_duplicates = sum(s["duplicates"] for s in per_file.values())
+    pipeline = summarize(pipeline_stats)
+    if dedup is not None:
+        pipeline["dedup"] = dedup.stats()
+        try:
+            save_filter(dedup)
+        except OSError as e:
+            print(f"[WARN] Could not save duplicate filter state: {e}")
 
-    print(f"\n[✓] Total Ingestion complete. Processed: {total_processed}, Inserted: {total_inserted}")
-    return {"status": "completed", "processed": total_processed, "inserted": total_inserted}
+    print(f"\n[✓] Total Ingestion complete. Processed: {total_processed}, Inserted: {total_inserted}, Duplicates: {total_duplicates}")
+    print(f"[i] Pipeline: parse {pipeline['parse_rate']} docs/s over {pipeline['produce_seconds']}s, "
+          f"write {pipeline['write_rate']} docs/s per writer over {pipeline['write_seconds']}s, "
+          f"queue-full stall {pipeline['stall_seconds']}s, "
+          f"{pipeline['prefiltered']} duplicate(s) dropped before insert, "
+          f"peak RSS {pipeline['peak_rss_mb']} MB{' (compact records)' if options['compact'] else ''}")
+    for source, c in source_metrics.as_dict().items():
+        if c["rejected"]:
+            print(f"[WARN] {source}: {c['rejected']} record(s) rejected "
+                  f"({c['parsed']} parsed, {c['normalized']} normalized, {c['dead_lettered']} dead-lettered)")
+    if dead_letter["written"] or dead_letter["dropped"]:
+        print(f"[i] Dead letters: {dead_letter['written']} written to {DEAD_LETTER_DIR}, {dead_letter['dropped']} dropped")
+    return {"status": "completed", "processed": total_processed, "inserted": total_inserted,
+            "duplicates": total_duplicates, "workers": workers, "pipeline": pipeline,
+            "sources": source_metrics.as_dict(), "dead_letter": dead_letter}
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+"""
+Streaming multi-line record assembler.
+
+Some logs spread one event over several lines (e.g. the Sysmon registry
+events in datasets/Registry_log.txt: header, Key, Value Name, Value Data,
+Status). MultilineAssembler groups such lines into one record:
+
+  - a line matching any `start_patterns` regex opens a new record
+  - following lines are continuation lines until the next start line, a blank
+    line (if end_on_blank) or a line matching `end_patterns`
+  - lines outside a record are skipped (preamble, prose, separators)
+  - a record is capped at `max_record_bytes`; further continuation lines are
+    dropped and the record is flagged as truncated
+
+Only one record is held in memory at a time.
+"""
+
+import os
+import re
+
+MAX_RECORD_BYTES = int(os.environ.get("INGEST_MULTILINE_MAX_BYTES", str(64 * 1024)))
+
+
+class MultilineRecord:
+    __slots__ = ("raw", "lines", "size", "truncated")
+
+    def __init__(self):
+        self.raw = []
+        self.lines = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, raw, line):
+        self.raw.append(raw)
+        self.lines.append(line)
+        self.size += len(raw)
+
+    def raw_bytes(self):
+        return b"".join(self.raw)
+
+
+class MultilineAssembler:
+    def __init__(self, start_patterns, end_patterns=(), end_on_blank=True,
+                 max_record_bytes=MAX_RECORD_BYTES):
+        self.start = [re.compile(p) if isinstance(p, str) else p for p in start_patterns]
+        self.end = [re.compile(p) if isinstance(p, str) else p for p in end_patterns]
+        self.end_on_blank = end_on_blank
+        self.max_record_bytes = max_record_bytes
+        self.records = 0
+        self.truncated = 0
+        self.skipped_lines = 0
+
+    def is_start(self, line):
+        return any(p.match(line) for p in self.start)
+
+    def _is_end(self, line):
+        return (self.end_on_blank and not line) or any(p.match(line) for p in self.end)
+
+    def assemble(self, lines):
+        """
+        lines: iterator of raw line bytes.
+        Yields MultilineRecord objects (stripped decoded lines + raw bytes).
+        """
+        current = None
+        for raw in lines:
+            line = raw.decode("utf-8", errors="ignore").strip()
+
+            if self.is_start(line):
+                if current is not None:
+                    yield self._finish(current)
+                current = MultilineRecord()
+                current.add(raw, line)
+                continue
+
+            if current is None:
+                self.skipped_lines += 1
+                continue
+
+            if self._is_end(line):
+                yield self._finish(current)
+                current = None
+                continue
+
+            if current.truncated or current.size + len(raw) > self.max_record_bytes:
+                current.truncated = True
+                continue
+            current.add(raw, line)
+
+        if current is not None:
+            yield self._finish(current)
+
+    def _finish(self, record):
+        self.records += 1
+        if record.truncated:
+            self.truncated += 1
+        return record
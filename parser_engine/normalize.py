@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from parser_engine.timestamps import parse_timestamp, format_timestamp
 
 # ------------------------------------------------------------
 # NORMALIZATION UTILITIES
@@ -9,35 +10,13 @@ def normalize_timestamp(ts: str):
     """
     Convert various timestamp formats to:
     YYYY-MM-DD HH:MM:SS
+    (parsing is done by parser_engine.timestamps)
     """
-
-    # Replace T with space, remove Z if present
-    ts = ts.replace("T", " ").replace("Z", "")
-
-    # Try known formats
-    known_formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M:%S.%f",
-        "%Y-%m-%d %H:%M",
-        "%Y/%m/%d %H:%M:%S",
-        "%b %d %H:%M:%S",           # syslog (missing year)
-        "%Y-%m-%d",                 # fallback
-    ]
-
-    for fmt in known_formats:
-        try:
-            dt = datetime.strptime(ts, fmt)
-
-            # If no year in syslog, assign 2025
-            if fmt == "%b %d %H:%M:%S":
-                dt = dt.replace(year=2025)
-
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
-        except:
-            continue
-
-    # last fallback — return raw
-    return ts
+    dt = parse_timestamp(ts)
+    if dt is None:
+        # last fallback — return raw, with T replaced and Z removed as before
+        return ts.replace("T", " ").replace("Z", "") if isinstance(ts, str) else ts
+    return format_timestamp(dt)
 
 
 def normalize_os(os_field: str):
@@ -0,0 +1,428 @@
+"""
+Format-sniffing reader registry for dataset files.
+
+Files may be plain or compressed (.gz/.bz2/.xz, and .zst when the zstandard
+package is installed); open_log_file() decompresses them as a stream.
+
+detect_format() looks at the first SNIFF_BYTES of a file once, caches the
+result per (path, inode), and stream_logs() hands the file to the matching
+reader. Readers turn raw lines into structured items so normalization gets
+real fields instead of pattern-matching opaque `raw_message` text.
+
+Registered formats (checked in order):
+    windows_event_json : NXLog-style JSON Lines with EventTime/Hostname
+    sysmon_json        : JSON Lines with EventID/Computer
+    firewall_json      : JSON Lines with log_type == "firewall"
+    json               : any other JSON Lines
+    registry_block     : multi-line Sysmon/Security registry events
+    multiline          : block records starting at INGEST_MULTILINE_START
+                         patterns (only registered when that is set)
+    syslog             : RFC3164 / RFC5424 syslog lines
+    raw                : anything else, one line per record
+"""
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+from datetime import datetime
+
+from parser_engine.multiline import MultilineAssembler, MAX_RECORD_BYTES as MULTILINE_MAX_BYTES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNIFF_BYTES = 8192
+# Read size for plain and decompressed streams
+READ_BUFFER = 1024 * 1024
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+
+# ------------------------------------------------------------
+# FILE OPENING (plain or compressed)
+# ------------------------------------------------------------
+def compression_of(filepath):
+    """Return the compression suffix of `filepath` ('.gz', ...) or None."""
+    for suffix in COMPRESSED_SUFFIXES:
+        if filepath.endswith(suffix):
+            return suffix
+    return None
+
+
+def strip_compression(filepath):
+    suffix = compression_of(filepath)
+    return filepath[:-len(suffix)] if suffix else filepath
+
+
+def open_log_file(filepath):
+    """
+    Open `filepath` for binary reading, decompressing .gz/.bz2/.xz/.zst on
+    the fly. Offsets seen by readers are positions in the decompressed stream.
+    """
+    suffix = compression_of(filepath)
+    if suffix is None:
+        return open(filepath, "rb", buffering=READ_BUFFER)
+    if suffix == ".gz":
+        raw = gzip.open(filepath, "rb")
+    elif suffix == ".bz2":
+        raw = bz2.open(filepath, "rb")
+    elif suffix == ".xz":
+        raw = lzma.open(filepath, "rb")
+    else:
+        if zstandard is None:
+            raise ImportError(f"zstandard package is required to read {filepath}")
+        fh = open(filepath, "rb")
+        raw = zstandard.ZstdDecompressor().stream_reader(fh, read_size=READ_BUFFER, closefd=True)
+    return io.BufferedReader(raw, buffer_size=READ_BUFFER)
+
+
+# ------------------------------------------------------------
+# LINE ITERATION
+# ------------------------------------------------------------
+def iter_lines(f, start=0, end=None):
+    """
+    Yield raw lines (bytes) whose first byte lies in [start, end).
+    A line straddling `start` belongs to the previous chunk, so we back up
+    one byte and discard through the next newline.
+    """
+    if start > 0:
+        _skip(f, start - 1)
+        pos = start - 1 + len(f.readline())
+    else:
+        pos = 0
+
+    for line in f:
+        if end is not None and pos >= end:
+            break
+        pos += len(line)
+        yield line
+
+
+def _skip(f, n):
+    """Advance `f` by n bytes; decompressing streams cannot seek, so read through."""
+    if f.seekable():
+        f.seek(n)
+        return
+    while n > 0:
+        chunk = f.read(min(n, READ_BUFFER))
+        if not chunk:
+            break
+        n -= len(chunk)
+
+
+def _decode(raw):
+    return raw.decode("utf-8", errors="ignore")
+
+
+# ------------------------------------------------------------
+# REGISTRY
+# ------------------------------------------------------------
+class Reader:
+    """
+    name       : format name stored in the cache
+    sniff      : fn(sample_lines: list[str], filename) -> bool
+    parse      : fn(lines: iterator[bytes], filename, on_error=None)
+                 -> iterator[(raw, item)]; on_error(raw, exc) is called for
+                 lines that cannot be decoded instead of dropping them silently
+    splittable : whether byte-range chunks can be parsed independently
+    """
+    def __init__(self, name, sniff, parse, splittable=True):
+        self.name = name
+        self.sniff = sniff
+        self.parse = parse
+        self.splittable = splittable
+
+
+READERS = {}
+_ORDER = []
+_FORMAT_CACHE = {}
+
+
+def register_reader(name, sniff, parse, splittable=True):
+    READERS[name] = Reader(name, sniff, parse, splittable)
+    if name not in _ORDER:
+        _ORDER.append(name)
+    return READERS[name]
+
+
+def _sample_lines(filepath):
+    with open_log_file(filepath) as f:
+        head = f.read(SNIFF_BYTES)
+    lines = head.split(b"\n")
+    if len(head) == SNIFF_BYTES and len(lines) > 1:
+        lines = lines[:-1]  # last line is probably cut off
+    return [l for l in (_decode(x).strip() for x in lines) if l]
+
+
+def detect_format(filepath):
+    """Return the reader name for `filepath` (sniffed once per path+inode)."""
+    key = (os.path.abspath(filepath), os.stat(filepath).st_ino)
+    fmt = _FORMAT_CACHE.get(key)
+    if fmt:
+        return fmt
+
+    filename = os.path.basename(strip_compression(filepath))
+    sample = _sample_lines(filepath)
+    fmt = None
+    for name in _ORDER:
+        if READERS[name].sniff(sample, filename):
+            fmt = name
+            break
+    if fmt is None:
+        fmt = "json" if strip_compression(filepath).endswith((".json", ".jsonl")) else "raw"
+
+    _FORMAT_CACHE[key] = fmt
+    return fmt
+
+
+def get_reader(filepath):
+    return READERS[detect_format(filepath)]
+
+
+# ------------------------------------------------------------
+# JSON LINES READERS
+# ------------------------------------------------------------
+def _json_objects(sample, limit=5):
+    objs = []
+    for line in sample[:limit]:
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return []
+        if not isinstance(obj, dict):
+            return []
+        objs.append(obj)
+    return objs
+
+
+def _sniff_json_keys(*keys):
+    def sniff(sample, filename):
+        objs = _json_objects(sample)
+        return bool(objs) and all(all(k in o for k in keys) for o in objs)
+    return sniff
+
+
+def _sniff_firewall(sample, filename):
+    objs = _json_objects(sample)
+    return bool(objs) and all(o.get("log_type") == "firewall" for o in objs)
+
+
+def _sniff_json(sample, filename):
+    return bool(_json_objects(sample))
+
+
+def parse_json_lines(lines, filename, on_error=None):
+    for raw in lines:
+        line = _decode(raw)
+        if not line.strip():
+            continue
+        if line.startswith("<<<<") or line.startswith("====") or line.startswith(">>>>"):
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            if on_error:
+                on_error(raw, e)
+            continue
+        if isinstance(item, dict):
+            yield raw, item
+        elif on_error:
+            on_error(raw, TypeError(f"expected a JSON object, got {type(item).__name__}"))
+
+
+register_reader("windows_event_json", _sniff_json_keys("EventTime", "Hostname"), parse_json_lines)
+register_reader("sysmon_json", _sniff_json_keys("EventID", "Computer"), parse_json_lines)
+register_reader("firewall_json", _sniff_firewall, parse_json_lines)
+register_reader("json", _sniff_json, parse_json_lines)
+
+
+# ------------------------------------------------------------
+# REGISTRY BLOCK READER
+# ------------------------------------------------------------
+REGISTRY_HEADER = re.compile(
+    r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\s+(\S+)\s+EventID=(\d+)(?:\s+User=(.*))?$"
+)
+REGISTRY_FIELDS = {
+    "key": "key",
+    "value name": "value_name",
+    "value": "value_name",
+    "value data": "value_data",
+    "new data": "value_data",
+    "access": "access",
+    "status": "status",
+}
+
+
+def _sniff_registry(sample, filename):
+    return any(REGISTRY_HEADER.match(l) for l in sample)
+
+
+def _registry_item(block_lines, filename):
+    header = REGISTRY_HEADER.match(block_lines[0])
+    item = {
+        "format": "registry",
+        "timestamp": header.group(1),
+        "channel": header.group(2),
+        "event_id": int(header.group(3)),
+        "user": (header.group(4) or "").strip(),
+        "action": "",
+        "source": filename,
+        "raw_message": "\n".join(block_lines),
+    }
+    for line in block_lines[1:]:
+        name, sep, value = line.partition(":")
+        field = REGISTRY_FIELDS.get(name.strip().lower()) if sep else None
+        if field:
+            item[field] = value.strip()
+        elif not item["action"]:
+            item["action"] = line.rstrip(":")
+    return item
+
+
+def parse_registry_blocks(lines, filename, on_error=None):
+    """
+    Group "[ts] Channel EventID=N User=..." headers with their following
+    "Field: value" lines into one item. Text outside a block is ignored.
+    """
+    assembler = MultilineAssembler([REGISTRY_HEADER], end_patterns=[r"^---"])
+    for record in assembler.assemble(lines):
+        item = _registry_item(record.lines, filename)
+        if record.truncated:
+            item["truncated"] = True
+        yield record.raw_bytes(), item
+
+
+register_reader("registry_block", _sniff_registry, parse_registry_blocks, splittable=False)
+
+
+# ------------------------------------------------------------
+# CONFIGURABLE MULTI-LINE READER
+# ------------------------------------------------------------
+# JSON list of start-of-record regexes, e.g. '["^\\d{4}-\\d{2}-\\d{2} ", "^Traceback"]'
+MULTILINE_START = json.loads(os.environ.get("INGEST_MULTILINE_START", "[]"))
+
+
+def register_multiline_reader(name, start_patterns, build_item=None, end_patterns=(),
+                              end_on_blank=True, max_record_bytes=MULTILINE_MAX_BYTES):
+    """
+    Register a block-structured format: records open on a line matching one of
+    `start_patterns`. build_item(lines, filename) turns the stripped lines of a
+    record into an item; by default the block becomes one raw_message.
+    """
+    start = [re.compile(p) for p in start_patterns]
+    build = build_item or _multiline_item
+
+    def sniff(sample, filename):
+        return any(p.match(l) for p in start for l in sample)
+
+    def parse(lines, filename, on_error=None):
+        assembler = MultilineAssembler(start, end_patterns, end_on_blank, max_record_bytes)
+        for record in assembler.assemble(lines):
+            item = build(record.lines, filename)
+            if record.truncated:
+                item["truncated"] = True
+            yield record.raw_bytes(), item
+
+    return register_reader(name, sniff, parse, splittable=False)
+
+
+def _multiline_item(block_lines, filename):
+    return {
+        "raw_message": "\n".join(block_lines),
+        "source": filename,
+        "timestamp": datetime.now()  # Placeholder for raw logs
+    }
+
+
+if MULTILINE_START:
+    register_multiline_reader("multiline", MULTILINE_START)
+
+
+# ------------------------------------------------------------
+# SYSLOG READER (RFC3164 / RFC5424)
+# ------------------------------------------------------------
+RFC5424 = re.compile(
+    r"^<(\d{1,3})>\d{1,2} (\S+) (\S+) (\S+) (\S+) (\S+) (-|(?:\[.*?\])+) ?(.*)$"
+)
+RFC3164 = re.compile(
+    r"^(?:<(\d{1,3})>)?([A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) (\S+) ([^:\[\s]+)(?:\[(\d+)\])?:? ?(.*)$"
+)
+
+
+def parse_syslog_line(line, source):
+    """Split one syslog line into fields. Returns None if it is not syslog."""
+    m = RFC5424.match(line)
+    if m:
+        pri, ts, host, app, pid, _msgid, _sd, msg = m.groups()
+        return {
+            "format": "syslog",
+            "priority": int(pri),
+            "timestamp": ts,
+            "host": host,
+            "app": app if app != "-" else "",
+            "pid": pid if pid != "-" else "",
+            "message": msg,
+            "source": source,
+            "raw_message": line,
+        }
+    m = RFC3164.match(line)
+    if m:
+        pri, ts, host, app, pid, msg = m.groups()
+        return {
+            "format": "syslog",
+            "priority": int(pri) if pri else None,
+            "timestamp": ts,
+            "host": host,
+            "app": app,
+            "pid": pid or "",
+            "message": msg,
+            "source": source,
+            "raw_message": line,
+        }
+    return None
+
+
+def _sniff_syslog(sample, filename):
+    if not sample:
+        return False
+    hits = sum(1 for l in sample if RFC5424.match(l) or RFC3164.match(l))
+    return hits * 2 > len(sample)
+
+
+def parse_syslog(lines, filename, on_error=None):
+    for raw in lines:
+        line = _decode(raw).strip()
+        if not line or line.startswith("#"):
+            continue
+        item = parse_syslog_line(line, filename)
+        if item is None:
+            item = {"raw_message": line, "source": filename,
+                    "timestamp": datetime.now()}  # Placeholder for raw logs
+        yield raw, item
+
+
+register_reader("syslog", _sniff_syslog, parse_syslog)
+
+
+# ------------------------------------------------------------
+# RAW TEXT READER (fallback)
+# ------------------------------------------------------------
+def parse_raw(lines, filename, on_error=None):
+    for raw in lines:
+        line = _decode(raw).strip()
+        if not line or line.startswith("#"):
+            continue  # Skip comments
+        yield raw, {
+            "raw_message": line,
+            "source": filename,
+            "timestamp": datetime.now()  # Placeholder for raw logs
+        }
+
+
+register_reader("raw", lambda sample, filename: False, parse_raw)
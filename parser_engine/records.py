@@ -0,0 +1,79 @@
+"""
+Compact record type for memory-bounded ingestion.
+
+A normalized log held as a dict costs several hundred bytes of hash table on
+top of its values. In compact mode (INGEST_COMPACT=1 or the 'compact' payload
+key) ingest_file() turns each normalized document into a NormalizedLog right
+away, so batches waiting in the BulkWriter queue hold slotted objects, and
+to_document() builds the BSON-ready dict only on the writer thread just
+before insert_many().
+
+Fields a handler did not set stay unset and are left out of the document, so
+the stored documents are identical in both modes.
+"""
+
+import os
+
+COMPACT_MODE = os.environ.get("INGEST_COMPACT", "0") == "1"
+
+# Document keys in the order the normalization handlers emit them
+FIELDS = ("_id", "timestamp", "host", "os", "software", "version", "event_type",
+          "message", "source", "severity", "user", "cpe")
+_SLOTS = tuple("id_" if f == "_id" else f for f in FIELDS)
+_FIELD_SLOT = dict(zip(FIELDS, _SLOTS))
+
+
+class NormalizedLog:
+    # `extra` holds any key outside FIELDS (None when there is none)
+    __slots__ = _SLOTS + ("extra",)
+
+    def __init__(self, **fields):
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_document(cls, doc):
+        rec = cls.__new__(cls)
+        rec.extra = None
+        for key, value in doc.items():
+            slot = _FIELD_SLOT.get(key)
+            if slot is None:
+                if rec.extra is None:
+                    rec.extra = {}
+                rec.extra[key] = value
+            else:
+                setattr(rec, slot, value)
+        return rec
+
+    def __setitem__(self, key, value):
+        slot = _FIELD_SLOT.get(key)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        else:
+            setattr(self, slot, value)
+
+    def __getitem__(self, key):
+        slot = _FIELD_SLOT.get(key)
+        try:
+            return getattr(self, slot) if slot else (self.extra or {})[key]
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def to_document(self):
+        """Build the dict handed to insert_many()."""
+        doc = {}
+        for key, slot in zip(FIELDS, _SLOTS):
+            try:
+                doc[key] = getattr(self, slot)
+            except AttributeError:
+                pass
+        if self.extra:
+            doc.update(self.extra)
+        return doc
+
+
+def as_document(rec):
+    return rec.to_document() if isinstance(rec, NormalizedLog) else rec
@@ -0,0 +1,288 @@
+"""
+Storage modes for normalized_logs (LOG_STORAGE_MODE or the 'storage_mode'
+payload key).
+
+    flat       : one plain collection (default, unchanged behaviour)
+    timeseries : normalized_logs is created as a MongoDB time-series
+                 collection (timeField "timestamp", metaField "meta" holding
+                 host/source). Falls back to "buckets" on servers without
+                 time-series support or when a regular normalized_logs
+                 already exists (a collection cannot be converted in place).
+    buckets    : flat normalized_logs plus one counter document per
+                 day/host/source in log_buckets with per-hour counts.
+                 Time-range counts and the hourly activity trend are served
+                 from these instead of scanning the logs.
+
+In time-series mode host and source are stored twice: at the top level,
+where every reader (log_service, stats_service, the matcher) filters on
+them, and as the "meta" sub-document. No query reads meta; it exists so
+the server groups measurements of one host/source into the same internal
+buckets, which is what makes the collection compact. Moving the fields
+into meta only would mean rewriting every reader for this one mode.
+
+Time-series collections have no unique _id index, so duplicate suppression
+relies on the pre-insert filter (parser_engine.dedup) in that mode.
+
+prepare_storage() records the mode in effect in sync_logs, and readers
+(buckets_enabled) go by that record rather than their own environment, so
+the API and an ingest run with a 'storage_mode' payload agree.
+
+LOG_RETENTION_DAYS > 0 adds TTL retention: expireAfterSeconds on the
+time-series collection, or TTL indexes on normalized_logs.timestamp and
+log_buckets.day.
+"""
+
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+STORAGE_MODE = os.environ.get("LOG_STORAGE_MODE", "flat")
+RETENTION_DAYS = int(os.environ.get("LOG_RETENTION_DAYS", "0"))
+LOGS_COLLECTION = "normalized_logs"
+BUCKETS_COLLECTION = "log_buckets"
+STATE_COLLECTION = "sync_logs"
+STATE_ID = "log_storage"
+MODES = ("flat", "timeseries", "buckets")
+
+
+def _day(ts):
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class LogStorage:
+    """Per-mode hooks used by the BulkWriter around insert_many()."""
+    def __init__(self, db, mode=STORAGE_MODE):
+        if mode not in MODES:
+            raise ValueError(f"Unknown storage mode '{mode}' (choose from {', '.join(MODES)})")
+        self.db = db
+        self.mode = mode
+        self.logs = db[LOGS_COLLECTION]
+        self.buckets = db[BUCKETS_COLLECTION]
+
+    def prepare_batch(self, docs):
+        """Shape documents for the target collection before insert."""
+        if self.mode == "timeseries":
+            for d in docs:
+                if not isinstance(d.get("timestamp"), datetime):
+                    # Time-series collections reject non-date time fields
+                    d["timestamp_raw"] = d.get("timestamp")
+                    d["timestamp"] = datetime.utcnow()
+                # Copy, not move: readers filter on the top-level fields
+                d["meta"] = {"host": d.get("host"), "source": d.get("source")}
+        return docs
+
+    def on_inserted(self, docs):
+        """Fold successfully inserted documents into the day buckets."""
+        if self.mode != "buckets" or not docs:
+            return
+        update_buckets(self.buckets, docs)
+
+    def clear(self):
+        self.buckets.delete_many({})
+
+
+# ------------------------------------------------------------
+# BUCKETS
+# ------------------------------------------------------------
+def bucket_key(day, host, source):
+    return f"{day:%Y-%m-%d}|{host}|{source}"
+
+
+def update_buckets(buckets, docs):
+    groups = defaultdict(lambda: {"count": 0, "hours": defaultdict(int), "first": None, "last": None})
+    for d in docs:
+        ts = d.get("timestamp")
+        if not isinstance(ts, datetime):
+            continue
+        g = groups[(_day(ts), d.get("host"), d.get("source"))]
+        g["count"] += 1
+        g["hours"][f"{ts.hour:02d}"] += 1
+        g["first"] = ts if g["first"] is None or ts < g["first"] else g["first"]
+        g["last"] = ts if g["last"] is None or ts > g["last"] else g["last"]
+
+    ops = []
+    for (day, host, source), g in groups.items():
+        inc = {"count": g["count"]}
+        inc.update({f"hours.{h}": n for h, n in g["hours"].items()})
+        ops.append(UpdateOne(
+            {"_id": bucket_key(day, host, source)},
+            {"$inc": inc,
+             "$setOnInsert": {"day": day, "host": host, "source": source},
+             "$min": {"first_seen": g["first"]},
+             "$max": {"last_seen": g["last"]}},
+            upsert=True,
+        ))
+    if ops:
+        buckets.bulk_write(ops, ordered=False)
+
+
+def rebuild_buckets(logs, buckets, batch_size=5000):
+    """Backfill log_buckets from the documents already in normalized_logs."""
+    buckets.delete_many({})
+    batch = []
+    n = 0
+    for d in logs.find({"timestamp": {"$type": "date"}}, {"timestamp": 1, "host": 1, "source": 1}):
+        batch.append(d)
+        if len(batch) >= batch_size:
+            update_buckets(buckets, batch)
+            n += len(batch)
+            batch = []
+    if batch:
+        update_buckets(buckets, batch)
+        n += len(batch)
+    return n
+
+
+def count_range(logs, buckets, start=None, end=None, retention_days=RETENTION_DAYS):
+    """
+    Exact number of logs with start <= timestamp <= end: whole days inside
+    the range are summed from buckets, the partial days at either edge are
+    counted in normalized_logs (timestamp index).
+    """
+    if retention_days > 0:
+        # Buckets of days TTL is still trimming are stale; count them live
+        floor = datetime.utcnow() - timedelta(days=retention_days)
+        start = max(start, floor) if start else floor
+
+    one_day = timedelta(days=1)
+    # Whole days lying inside the range: [first_day, last_day] (None = open)
+    first_day = None if start is None else (start if start == _day(start) else _day(start) + one_day)
+    last_day = None if end is None else _day(end) - one_day
+
+    if first_day and last_day and first_day > last_day:
+        q = {"$lte": end}
+        if start:
+            q["$gte"] = start
+        return logs.count_documents({"timestamp": q})
+
+    day_q = {}
+    if first_day:
+        day_q["$gte"] = first_day
+    if last_day:
+        day_q["$lte"] = last_day
+    total = 0
+    for d in buckets.aggregate([{"$match": {"day": day_q} if day_q else {}},
+                                {"$group": {"_id": None, "n": {"$sum": "$count"}}}]):
+        total += d["n"]
+
+    # Partial days at the edges
+    if start and start < first_day:
+        total += logs.count_documents({"timestamp": {"$gte": start, "$lt": first_day}})
+    if end:
+        total += logs.count_documents({"timestamp": {"$gte": _day(end), "$lte": end}})
+    return total
+
+
+def hourly_trend(buckets):
+    """Logs per hour of day ("HH:00" -> count) summed over all buckets."""
+    pipeline = [
+        {"$project": {"hours": {"$objectToArray": "$hours"}}},
+        {"$unwind": "$hours"},
+        {"$group": {"_id": "$hours.k", "count": {"$sum": "$hours.v"}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return {f"{d['_id']}:00": d["count"] for d in buckets.aggregate(pipeline)}
+
+
+_ENABLED_CACHE = {}
+
+
+def save_active_mode(db, mode):
+    try:
+        db[STATE_COLLECTION].update_one(
+            {"_id": STATE_ID},
+            {"$set": {"mode": mode, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"[WARN] Could not record storage mode: {e}")
+    _ENABLED_CACHE.pop(db.name, None)
+
+
+def active_mode(db):
+    """Mode recorded by the last prepare_storage(); LOG_STORAGE_MODE if none yet."""
+    doc = db[STATE_COLLECTION].find_one({"_id": STATE_ID})
+    return doc.get("mode", STORAGE_MODE) if doc else STORAGE_MODE
+
+
+def buckets_enabled(db, ttl=60):
+    """True when the bucket counters are maintained and populated (cached)."""
+    cached = _ENABLED_CACHE.get(db.name)
+    if cached and time.time() - cached[1] < ttl:
+        return cached[0]
+    try:
+        # Only "buckets" keeps the counters current
+        enabled = (active_mode(db) == "buckets"
+                   and db[BUCKETS_COLLECTION].estimated_document_count() > 0)
+    except PyMongoError:
+        enabled = False
+    _ENABLED_CACHE[db.name] = (enabled, time.time())
+    return enabled
+
+
+# ------------------------------------------------------------
+# SETUP
+# ------------------------------------------------------------
+def prepare_storage(db, mode=STORAGE_MODE, retention_days=RETENTION_DAYS):
+    """
+    Create collections and TTL indexes for `mode` and return the LogStorage
+    for the mode actually in effect (time-series may fall back to buckets).
+    """
+    ttl = retention_days * 86400 if retention_days > 0 else None
+    info = next(iter(db.list_collections(filter={"name": LOGS_COLLECTION})), None)
+
+    if mode == "timeseries":
+        if info is None:
+            options = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"}}
+            if ttl:
+                options["expireAfterSeconds"] = ttl
+            try:
+                db.create_collection(LOGS_COLLECTION, **options)
+                print("[+] Created time-series collection normalized_logs")
+            except PyMongoError as e:
+                print(f"[WARN] Time-series collections unavailable ({e}); using day buckets.")
+                mode = "buckets"
+        elif info.get("type") != "timeseries":
+            print("[WARN] normalized_logs already exists as a regular collection; using day buckets. "
+                  "Run ingestion with reset to recreate it as time-series.")
+            mode = "buckets"
+        elif ttl:
+            try:
+                db.command("collMod", LOGS_COLLECTION, expireAfterSeconds=ttl)
+            except PyMongoError as e:
+                print(f"[WARN] Could not set time-series retention: {e}")
+
+    storage = LogStorage(db, mode)
+    if mode == "timeseries":
+        save_active_mode(db, mode)
+        return storage
+
+    if ttl:
+        _ensure_ttl(storage.logs, "timestamp", ttl)
+    if mode == "buckets":
+        # Keep a bucket one day longer than the logs it counts
+        if ttl:
+            _ensure_ttl(storage.buckets, "day", ttl + 86400)
+        else:
+            storage.buckets.create_index("day")
+        if storage.buckets.estimated_document_count() == 0 and storage.logs.estimated_document_count() > 0:
+            print("[+] Backfilling log_buckets from existing logs...")
+            print(f"[+] Bucketed {rebuild_buckets(storage.logs, storage.buckets)} logs")
+    # Recorded only now, so readers never use half-backfilled buckets
+    save_active_mode(db, mode)
+    return storage
+
+
+def _ensure_ttl(col, field, seconds):
+    name = f"{field}_ttl"
+    try:
+        col.create_index(field, name=name, expireAfterSeconds=seconds)
+    except PyMongoError:
+        # Index exists with another expiry: update it in place
+        try:
+            col.database.command("collMod", col.name, index={"name": name, "expireAfterSeconds": seconds})
+        except PyMongoError as e:
+            print(f"[WARN] Could not set TTL on {col.name}.{field}: {e}")
@@ -0,0 +1,322 @@
+"""
+asyncio syslog receiver feeding the ingestion pipeline.
+
+Listens on UDP and TCP and hands batches of messages to the same
+normalize + bulk-insert path file ingestion uses (insert_to_mongo.ingest_items).
+
+TCP accepts both framings from RFC6587 (as used by RFC5425):
+    octet counting : "<len> <message>"
+    non-transparent: one message per LF-terminated line
+
+Messages go through a bounded asyncio.Queue:
+    - UDP datagrams are dropped (and counted) when the queue is full
+    - TCP connections wait for space (counted as backpressure), which stops
+      reading from the socket and lets TCP flow control slow the sender
+A single flusher task drains the queue and inserts a batch when it reaches
+SYSLOG_BATCH_SIZE messages or SYSLOG_FLUSH_SECONDS after its first message.
+
+Run standalone:
+    python -m parser_engine.syslog_listener
+or alongside the API by setting SYSLOG_LISTENER=1 (see backend/main.py).
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from parser_engine.readers import parse_syslog_line
+from parser_engine.record_id import get_id_strategy, ID_STRATEGY
+
+# ------------------------------------------------------------
+# CONFIG
+# ------------------------------------------------------------
+SYSLOG_HOST = os.environ.get("SYSLOG_HOST", "0.0.0.0")
+SYSLOG_UDP_PORT = int(os.environ.get("SYSLOG_UDP_PORT", "5514"))  # 0 disables UDP
+SYSLOG_TCP_PORT = int(os.environ.get("SYSLOG_TCP_PORT", "5514"))  # 0 disables TCP
+SYSLOG_BATCH_SIZE = int(os.environ.get("SYSLOG_BATCH_SIZE", "500"))
+SYSLOG_FLUSH_SECONDS = float(os.environ.get("SYSLOG_FLUSH_SECONDS", "1.0"))
+SYSLOG_QUEUE_SIZE = int(os.environ.get("SYSLOG_QUEUE_SIZE", "10000"))
+SYSLOG_MAX_MESSAGE = int(os.environ.get("SYSLOG_MAX_MESSAGE", str(64 * 1024)))
+# Longest MSG-LEN accepted as an octet count
+MAX_LENGTH_DIGITS = 10
+
+_STOP = object()
+
+
+class SyslogListener:
+    def __init__(self, host=SYSLOG_HOST, udp_port=SYSLOG_UDP_PORT, tcp_port=SYSLOG_TCP_PORT,
+                 batch_size=SYSLOG_BATCH_SIZE, flush_seconds=SYSLOG_FLUSH_SECONDS,
+                 queue_size=SYSLOG_QUEUE_SIZE, max_message=SYSLOG_MAX_MESSAGE,
+                 id_strategy=ID_STRATEGY, sink=None):
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = flush_seconds
+        self.queue_size = max(1, int(queue_size))
+        self.max_message = max_message
+        self.make_id = get_id_strategy(id_strategy)
+        # sink(pairs, make_id) -> ingest_items()-style result; Mongo by default
+        self.sink = sink
+
+        self.counters = {
+            "received": 0,
+            "dropped": 0,
+            "backpressure_waits": 0,
+            "oversize": 0,
+            "batches": 0,
+            "inserted": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "errors": 0,
+        }
+        self._queue = None
+        self._loop = None
+        self._transport = None
+        self._server = None
+        self._flusher = None
+        self._stopped = None
+
+    # --------------------------------------------------------
+    # INPUT
+    # --------------------------------------------------------
+    def _offer(self, raw, source):
+        """Non-blocking enqueue (UDP). Returns False if the message was dropped."""
+        try:
+            self._queue.put_nowait((raw, source))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["received"] += 1
+        return True
+
+    async def _put(self, raw, source):
+        """Blocking enqueue (TCP): waiting here stops reads from the socket."""
+        if self._queue.full():
+            self.counters["backpressure_waits"] += 1
+        await self._queue.put((raw, source))
+        self.counters["received"] += 1
+
+    async def _read_frame(self, reader):
+        """Return the next TCP message (bytes), b"" for a skipped frame, None at EOF."""
+        head = await reader.read(1)
+        if not head:
+            return None
+
+        # Octet counting only when the frame starts with ASCII digits and a
+        # space; anything else (e.g. an ISO timestamp without PRI) is a line
+        while head.isdigit() and len(head) <= MAX_LENGTH_DIGITS:
+            b = await reader.read(1)
+            if not b:
+                return head
+            if b == b" ":
+                return await self._read_counted(reader, int(head))
+            head += b
+        if head.endswith(b"\n"):
+            return head
+        return await self._read_line(reader, head)
+
+    async def _read_counted(self, reader, length):
+        """Octet counting: MSG-LEN SP SYSLOG-MSG"""
+        if length > self.max_message:
+            self.counters["oversize"] += 1
+            while length > 0:
+                chunk = await reader.read(min(length, 65536))
+                if not chunk:
+                    return None
+                length -= len(chunk)
+            return b""
+        try:
+            return await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return None
+
+    async def _read_line(self, reader, head):
+        """Non-transparent framing: message ends at LF"""
+        try:
+            return head + await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return head + e.partial
+        except asyncio.LimitOverrunError as e:
+            self.counters["oversize"] += 1
+            # Discard the oversized line
+            await reader.read(e.consumed)
+            try:
+                await reader.readuntil(b"\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            return b""
+
+    async def _handle_tcp(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        source = f"syslog_tcp:{peer[0]}" if peer else "syslog_tcp"
+        try:
+            while True:
+                msg = await self._read_frame(reader)
+                if msg is None:
+                    break
+                if msg.strip():
+                    await self._put(msg, source)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    class _UDPProtocol(asyncio.DatagramProtocol):
+        def __init__(self, listener):
+            self.listener = listener
+
+        def datagram_received(self, data, addr):
+            if len(data) > self.listener.max_message:
+                self.listener.counters["oversize"] += 1
+                return
+            if data.strip():
+                self.listener._offer(data, f"syslog_udp:{addr[0]}")
+
+    # --------------------------------------------------------
+    # BATCH FLUSHING
+    # --------------------------------------------------------
+    def _to_pairs(self, batch):
+        pairs = []
+        for raw, source in batch:
+            line = raw.decode("utf-8", errors="ignore").strip()
+            item = parse_syslog_line(line, source)
+            if item is None:
+                item = {"raw_message": line, "source": source,
+                        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")}
+            pairs.append((raw, item))
+        return pairs
+
+    def _write(self, batch):
+        pairs = self._to_pairs(batch)
+        if self.sink is not None:
+            return self.sink(pairs, self.make_id)
+        from parser_engine.insert_to_mongo import ingest_items
+        return ingest_items(pairs, self.make_id)
+
+    async def _flush(self, batch):
+        try:
+            res = await self._loop.run_in_executor(None, self._write, batch)
+        except Exception as e:
+            print(f"[WARN] Syslog batch insert failed: {e}")
+            self.counters["errors"] += len(batch)
+            return
+        self.counters["batches"] += 1
+        for k in ("inserted", "duplicates", "rejected", "errors"):
+            self.counters[k] += res.get(k, 0)
+
+    async def _run_flusher(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - self._loop.time())
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                entry = None
+
+            if entry is _STOP:
+                if batch:
+                    await self._flush(batch)
+                return
+            if entry is not None:
+                if not batch:
+                    deadline = self._loop.time() + self.flush_seconds
+                batch.append(entry)
+
+            if batch and (len(batch) >= self.batch_size or self._loop.time() >= deadline):
+                await self._flush(batch)
+                batch = []
+                deadline = None
+
+    # --------------------------------------------------------
+    # LIFECYCLE
+    # --------------------------------------------------------
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopped = asyncio.Event()
+        self._flusher = asyncio.ensure_future(self._run_flusher())
+
+        if self.udp_port:
+            self._transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: self._UDPProtocol(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self._transport.get_extra_info("sockname")[1]
+            print(f"[+] Syslog UDP listening on {self.host}:{self.udp_port}")
+        if self.tcp_port:
+            # Stream limit bounds a single LF-framed message
+            self._server = await asyncio.start_server(
+                self._handle_tcp, self.host, self.tcp_port, limit=self.max_message)
+            self.tcp_port = self._server.sockets[0].getsockname()[1]
+            print(f"[+] Syslog TCP listening on {self.host}:{self.tcp_port}")
+
+    async def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Flush whatever is still queued
+        await self._queue.put(_STOP)
+        await self._flusher
+        if self.sink is None:
+            from parser_engine.insert_to_mongo import save_dedup
+            await self._loop.run_in_executor(None, save_dedup, True)
+        self._stopped.set()
+        print(f"[+] Syslog listener stopped: {self.stats()}")
+
+    async def serve_forever(self):
+        await self.start()
+        await self._stopped.wait()
+
+    def stop_threadsafe(self):
+        """Stop a listener running in another thread's event loop."""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+
+def start_in_thread(timeout=10.0, **kwargs):
+    """
+    Run a SyslogListener on its own event loop in a daemon thread.
+    Returns once the sockets are bound; a bind error is raised to the caller.
+    """
+    listener = SyslogListener(**kwargs)
+    started = threading.Event()
+    failure = []
+
+    async def run():
+        try:
+            await listener.start()
+        except Exception as e:
+            failure.append(e)
+            if listener._transport is not None:
+                listener._transport.close()
+            return
+        finally:
+            started.set()
+        await listener._stopped.wait()
+
+    threading.Thread(target=lambda: asyncio.run(run()), name="syslog-listener", daemon=True).start()
+    if not started.wait(timeout):
+        raise RuntimeError(f"Syslog listener did not start within {timeout}s")
+    if failure:
+        raise failure[0]
+    return listener
+
+
+def main():
+    listener = SyslogListener()
+    try:
+        asyncio.run(listener.serve_forever())
+    except KeyboardInterrupt:
+        print(f"[+] Syslog listener interrupted: {listener.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Timestamp parsing engine shared by normalization and validation.
+
+parse_timestamp(value, source) returns a naive `datetime` or None:
+  - hand-written fast paths for ISO-8601 and syslog ("Jun 14 15:16:01")
+  - remembers which parser last worked per source and tries it first
+  - memoizes second-resolution strings, which repeat heavily in log bursts
+  - falls back to the strptime formats normalize.py always accepted
+Offsets (Z, +05:45) are converted to UTC.
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+# Syslog (RFC3164) carries no year; keep the year normalize.py always assumed
+SYSLOG_YEAR = 2025
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+
+_ISO_RE = re.compile(
+    r"^(\d{4})[-/](\d{2})[-/](\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d{1,9}))?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+# Slow-path formats (same list normalize_timestamp has always tried)
+FALLBACK_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%b %d %H:%M:%S",
+    "%Y-%m-%d",
+]
+
+
+# ------------------------------------------------------------
+# FAST PATHS
+# ------------------------------------------------------------
+def parse_iso(s):
+    m = _ISO_RE.match(s)
+    if not m:
+        return None
+    year, month, day, hh, mm, ss, frac, tz = m.groups()
+    micro = int((frac + "000000")[:6]) if frac else 0
+    try:
+        dt = datetime(int(year), int(month), int(day),
+                      int(hh or 0), int(mm or 0), int(ss or 0), micro)
+    except ValueError:
+        return None
+    if tz and tz != "Z":
+        sign = -1 if tz[0] == "-" else 1
+        digits = tz[1:].replace(":", "")
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        dt -= sign * offset
+    return dt
+
+
+def parse_syslog(s):
+    # "Jun 14 15:16:01" / "Jun  4 15:16:01"
+    if len(s) != 15 or s[3] != " " or s[9] != ":" or s[12] != ":":
+        return None
+    month = _MONTHS.get(s[:3])
+    if not month:
+        return None
+    try:
+        return datetime(SYSLOG_YEAR, month, int(s[4:6]), int(s[7:9]), int(s[10:12]), int(s[13:15]))
+    except ValueError:
+        return None
+
+
+def _strptime_parser(fmt):
+    def parse(s):
+        try:
+            dt = datetime.strptime(s.replace("T", " ").replace("Z", ""), fmt)
+        except ValueError:
+            return None
+        if fmt == "%b %d %H:%M:%S":
+            dt = dt.replace(year=SYSLOG_YEAR)
+        return dt
+    return parse
+
+
+_PARSERS = [("iso", parse_iso), ("syslog", parse_syslog)] + [
+    (fmt, _strptime_parser(fmt)) for fmt in FALLBACK_FORMATS
+]
+_PARSERS_BY_NAME = dict(_PARSERS)
+
+# source -> name of the parser that last succeeded for it
+_SOURCE_FORMAT = {}
+
+
+# ------------------------------------------------------------
+# PUBLIC API
+# ------------------------------------------------------------
+def _parse_uncached(s, source):
+    name = _SOURCE_FORMAT.get(source)
+    if name:
+        dt = _PARSERS_BY_NAME[name](s)
+        if dt is not None:
+            return dt
+
+    for name, parser in _PARSERS:
+        dt = parser(s)
+        if dt is not None:
+            if source is not None:
+                _SOURCE_FORMAT[source] = name
+            return dt
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _parse_cached(s, source):
+    return _parse_uncached(s, source)
+
+
+def parse_timestamp(value, source=None):
+    """
+    Return `value` as a datetime, or None if it cannot be parsed.
+    `source` (e.g. the log source name) keys the per-source format cache.
+    """
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    s = value.strip()
+    if not s:
+        return None
+    # Only second-resolution strings repeat often enough to be worth caching
+    if len(s) <= 20:
+        return _parse_cached(s, source)
+    return _parse_uncached(s, source)
+
+
+def format_timestamp(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
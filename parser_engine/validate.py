@@ -1,4 +1,24 @@
+"""
+Validation of normalized logs before they are inserted into MongoDB.
+
+validate_log(log) checks one document and raises ValueError on the first
+problem, with its original rules: no empty field at all and a timestamp
+string in one of VALID_TIMESTAMP_FORMATS.
+
+validate_batch(docs) is the ingestion check and is more lenient: only the
+required fields must be non-empty and the timestamp may be a datetime or
+any string parser_engine.timestamps understands (fast paths, per-source
+format memo, cached strings). It never raises; it returns one error bitmask
+per record (0 = valid) plus a reason string for every invalid record, so the
+ingest loop can route records with plain integer tests.
+"""
+
+import os
 from datetime import datetime
+from parser_engine.timestamps import parse_timestamp
+
+# Run validate_batch() inline during ingestion (payload key 'validate')
+VALIDATE_ENABLED = os.environ.get("INGEST_VALIDATE", "1") == "1"
 
 # ------------------------------------------------------------
 # Required fields for normalized logs
@@ -16,7 +36,7 @@ REQUIRED_FIELDS = [
 ]
 
 # ------------------------------------------------------------
-# Timestamp formats allowed
+# Timestamp formats allowed (validate_log)
 # ------------------------------------------------------------
 
 VALID_TIMESTAMP_FORMATS = [
@@ -24,9 +44,64 @@ VALID_TIMESTAMP_FORMATS = [
     "%Y-%m-%d %H:%M:%S.%f",      # JSON events with microseconds
 ]
 
+# ------------------------------------------------------------
+# Error bits (validate_batch masks)
+# ------------------------------------------------------------
+
+ERR_NOT_A_RECORD = 1   # None, empty or not a mapping
+ERR_MISSING_FIELD = 2  # a required field is absent
+ERR_EMPTY_FIELD = 4    # a required field is "" or None
+ERR_TIMESTAMP = 8      # timestamp is neither a datetime nor parsable
+
+ERROR_NAMES = {
+    ERR_NOT_A_RECORD: "not_a_record",
+    ERR_MISSING_FIELD: "missing_field",
+    ERR_EMPTY_FIELD: "empty_field",
+    ERR_TIMESTAMP: "invalid_timestamp",
+}
+
+
+class InvalidRecord(ValueError):
+    """A normalized log that failed validation (dead-letter error class)."""
+
+
+def error_names(mask):
+    """Names of the error bits set in `mask`."""
+    return [name for bit, name in ERROR_NAMES.items() if mask & bit]
+
 
 # ------------------------------------------------------------
-# VALIDATION FUNCTION
+# CHECKS
+# ------------------------------------------------------------
+
+def _check(log):
+    """Return (mask, reason) for one record; reason is None when mask is 0."""
+    if not log or not hasattr(log, "get"):
+        return ERR_NOT_A_RECORD, "Log object is empty or None"
+
+    mask = 0
+    reasons = []
+    missing = [field for field in REQUIRED_FIELDS if field not in log]
+    if missing:
+        mask |= ERR_MISSING_FIELD
+        reasons.append(f"Missing required fields: {missing}")
+
+    empty_fields = [field for field in REQUIRED_FIELDS if field in log and log[field] in ("", None)]
+    if empty_fields:
+        mask |= ERR_EMPTY_FIELD
+        reasons.append(f"Empty or null values in: {empty_fields}")
+
+    ts = log.get("timestamp")
+    if ts not in ("", None) and not isinstance(ts, datetime) \
+            and parse_timestamp(ts, log.get("source")) is None:
+        mask |= ERR_TIMESTAMP
+        reasons.append(f"Invalid timestamp format: {ts}")
+
+    return mask, ("; ".join(reasons) if mask else None)
+
+
+# ------------------------------------------------------------
+# VALIDATION FUNCTIONS
 # ------------------------------------------------------------
 
 def validate_log(log: dict):
@@ -69,6 +144,33 @@ def validate_log(log: dict):
     return True
 
 
+def validate_batch(docs):
+    """
+    Validate a batch of normalized logs without raising.
+    Returns (masks, reasons): masks[i] is the error bitmask of docs[i]
+    (0 = valid) and reasons maps the index of every invalid record to a
+    readable explanation. Only required fields must be non-empty here;
+    optional ones (user, cpe, ...) may be blank.
+    """
+    masks = [0] * len(docs)
+    reasons = {}
+    required = REQUIRED_FIELDS
+    for i, log in enumerate(docs):
+        # Fast path: every required field set and an already-parsed timestamp
+        if isinstance(log, dict) and isinstance(log.get("timestamp"), datetime):
+            for field in required:
+                value = log.get(field)
+                if value is None or value == "":
+                    break
+            else:
+                continue
+        mask, reason = _check(log)
+        if mask:
+            masks[i] = mask
+            reasons[i] = reason
+    return masks, reasons
+
+
 # ------------------------------------------------------------
 # TEST BLOCK
 # ------------------------------------------------------------
@@ -106,3 +208,8 @@ if __name__ == "__main__":
         print(validate_log(sample_bad))
     except Exception as e:
         print("Error:", e)
+
+    print("\nTesting batch:")
+    masks, reasons = validate_batch([sample_good, sample_bad, {}])
+    for i, mask in enumerate(masks):
+        print(i, mask, error_names(mask), reasons.get(i))
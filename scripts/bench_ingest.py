@@ -0,0 +1,234 @@
+"""
+Ingestion benchmark.
+
+Generates synthetic logs (scripts/generate_logs.py) or reuses a directory of
+existing files and runs each one through parser_engine.insert_to_mongo
+.ingest_file(), reporting per file and in total:
+
+    lines/s, MB/s, peak RSS (highest current-RSS sample taken after each
+    batch while that file ran), and the time split between parse (reader),
+    normalize (_normalize), validate (validate_batch) and insert (writer
+    threads, summed).
+
+Targets:
+    --memory   in-memory stand-in collection: every batch is BSON-encoded
+               (the client-side cost of insert_many) and then discarded, so
+               the numbers show the pipeline without a server. Nothing is
+               kept, so duplicate _ids are not detected in this mode.
+    default    a local mongod (MONGO_URI). Writes go to the database in
+               VULN_DB, which defaults to "vulnerability_logs_bench" here;
+               its normalized_logs is emptied before the run unless --keep.
+
+Usage:
+    python scripts/bench_ingest.py --lines 1M --memory
+    python scripts/bench_ingest.py --lines 10M --formats syslog,sysmon --writers 4
+    python scripts/bench_ingest.py --data-dir /data/bench --json results.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Never benchmark into the live database unless asked to
+os.environ.setdefault("VULN_DB", "vulnerability_logs_bench")
+
+from generate_logs import FORMATS, FILE_NAMES, generate_all, parse_count, parse_formats  # noqa: E402
+
+try:
+    import bson
+except ImportError:
+    bson = None
+
+
+class _EmptyCursor(list):
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        return self
+
+
+class MemoryCollection:
+    """insert_many() stand-in: encodes each document like the driver, keeps nothing."""
+    name = "bench_normalized_logs"
+
+    def __init__(self):
+        self.inserted = 0
+        self.bytes = 0
+
+    def insert_many(self, docs, ordered=False):
+        if bson is not None:
+            for d in docs:
+                self.bytes += len(bson.encode(d))
+        self.inserted += len(docs)
+
+    def find(self, *args, **kwargs):
+        return _EmptyCursor()
+
+
+class StageTimer:
+    """Wraps a function and accumulates the time spent inside it."""
+    def __init__(self, fn):
+        self.fn = fn
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.calls += 1
+
+    def reset(self):
+        self.seconds = 0.0
+        self.calls = 0
+
+
+def _rate(n, seconds):
+    return round(n / seconds, 1) if seconds > 0 else 0.0
+
+
+def bench_file(m, path, options, normalize, validate):
+    normalize.reset()
+    validate.reset()
+    size = os.path.getsize(path)
+    t0 = time.perf_counter()
+    res = m.ingest_file(path, options=options)
+    wall = time.perf_counter() - t0
+
+    p = res["pipeline"]
+    produce = p["produce_seconds"]
+    parse = max(0.0, produce - normalize.seconds - validate.seconds)
+    return {
+        "file": os.path.basename(path),
+        "records": res["processed"],
+        "inserted": res["inserted"],
+        "rejected": sum(c["rejected"] for c in res["sources"].values()),
+        "bytes": size,
+        "wall_seconds": round(wall, 3),
+        "lines_per_sec": _rate(res["processed"], wall),
+        "mb_per_sec": round(size / 1e6 / wall, 2) if wall > 0 else 0.0,
+        "parse_seconds": round(parse, 3),
+        "normalize_seconds": round(normalize.seconds, 3),
+        "validate_seconds": round(validate.seconds, 3),
+        "insert_seconds": round(p["write_seconds"], 3),
+        "stall_seconds": round(p["stall_seconds"], 3),
+        "peak_rss_mb": p["peak_rss_mb"],
+    }
+
+
+def print_report(rows, target):
+    print(f"\n[i] Ingestion benchmark ({target})")
+    header = f"{'file':<24}{'records':>11}{'lines/s':>11}{'MB/s':>8}{'parse':>8}{'norm':>8}{'valid':>8}{'insert':>8}{'stall':>8}{'RSS MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['file']:<24}{r['records']:>11}{r['lines_per_sec']:>11}{r['mb_per_sec']:>8}"
+              f"{r['parse_seconds']:>8}{r['normalize_seconds']:>8}{r['validate_seconds']:>8}"
+              f"{r['insert_seconds']:>8}{r['stall_seconds']:>8}{r['peak_rss_mb']:>9}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark parser_engine ingestion on synthetic logs.")
+    ap.add_argument("--lines", default="100k", help="records per format to generate (default 100k)")
+    ap.add_argument("--formats", default="all", help=f"comma-separated subset of {','.join(FORMATS)}")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--data-dir", help="benchmark the files already in this directory instead of generating")
+    ap.add_argument("--memory", action="store_true", help="use the in-memory stand-in instead of mongod")
+    ap.add_argument("--keep", action="store_true", help="do not empty the benchmark collection first")
+    ap.add_argument("--batch-size", type=int)
+    ap.add_argument("--writers", type=int)
+    ap.add_argument("--queue-depth", type=int)
+    ap.add_argument("--dedup", action="store_true", help="enable the pre-insert duplicate filter")
+    ap.add_argument("--compact", action="store_true", help="use compact NormalizedLog records")
+    ap.add_argument("--no-validate", action="store_true", help="skip validate_batch()")
+    ap.add_argument("--json", help="also write the results to this JSON file")
+    args = ap.parse_args(argv)
+
+    import parser_engine.insert_to_mongo as m
+
+    if args.memory:
+        m.collection = MemoryCollection()
+        target = "in-memory stand-in"
+    else:
+        target = f"mongod {m.DB_NAME}.normalized_logs"
+        if m.DB_NAME == "vulnerability_logs" and not args.keep:
+            print("[ERR] Refusing to empty the live normalized_logs; set VULN_DB or pass --keep.")
+            return None
+        if not args.keep:
+            m.collection.delete_many({})
+
+    if args.dedup:
+        # Fresh filter: the saved Bloom state belongs to the live collection
+        from parser_engine.dedup import DuplicateFilter
+        m._dedup = DuplicateFilter(m.collection)
+
+    normalize = StageTimer(m._normalize)
+    validate = StageTimer(m.validate_batch)
+    m._normalize = normalize
+    m.validate_batch = validate
+
+    options = {"dedup": args.dedup, "compact": args.compact, "validate": not args.no_validate}
+    if args.memory:
+        # The stand-in has no server-side storage modes
+        options["storage_mode"] = "flat"
+    for key in ("batch_size", "writers", "queue_depth"):
+        if getattr(args, key):
+            options[key] = getattr(args, key)
+
+    tmp = None
+    if args.data_dir:
+        names = set(FILE_NAMES.values())
+        files = sorted(os.path.join(args.data_dir, f) for f in os.listdir(args.data_dir)
+                       if f in names or f.replace(".gz", "") in names)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="bench_ingest_")
+        generated = generate_all(parse_count(args.lines), tmp.name, parse_formats(args.formats), seed=args.seed)
+        files = [g["path"] for g in generated]
+    if not files:
+        print("[ERR] No benchmark files found.")
+        return None
+
+    rows = []
+    try:
+        for path in files:
+            print(f"[+] Ingesting {path}...")
+            rows.append(bench_file(m, path, options, normalize, validate))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    records = sum(r["records"] for r in rows)
+    size = sum(r["bytes"] for r in rows)
+    wall = sum(r["wall_seconds"] for r in rows)
+    total = {
+        "file": "TOTAL", "records": records, "inserted": sum(r["inserted"] for r in rows),
+        "rejected": sum(r["rejected"] for r in rows), "bytes": size, "wall_seconds": round(wall, 3),
+        "lines_per_sec": _rate(records, wall), "mb_per_sec": round(size / 1e6 / wall, 2) if wall > 0 else 0.0,
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in rows),
+    }
+    for key in ("parse_seconds", "normalize_seconds", "validate_seconds", "insert_seconds", "stall_seconds"):
+        total[key] = round(sum(r[key] for r in rows), 3)
+    print_report(rows + [total], target)
+    print(f"[✓] {records} records, {size / 1e6:.1f} MB in {wall:.1f}s: "
+          f"{total['lines_per_sec']} lines/s, {total['mb_per_sec']} MB/s, peak RSS {total['peak_rss_mb']} MB")
+
+    result = {"target": target, "options": options, "files": rows, "total": total}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"[+] Results written to {args.json}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
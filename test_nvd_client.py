@@ -0,0 +1,164 @@
+"""
+Retry and rate-limit checks for cve_engine.nvd_client (no network needed).
+
+Runs a mock NVD 2.0 endpoint on a free localhost port and points an
+NVDClient at it: 429 with Retry-After and 503 responses are retried,
+pages come back complete and in order, and the token bucket keeps every
+rolling window within the quota.
+
+    python test_nvd_client.py
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cve_engine.nvd_client import NVDClient, NVDError
+
+TOTAL_RESULTS = 45
+
+
+class MockNVD(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # status codes to answer (in order) before serving a keyword normally
+    failures = {}
+    hits = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        keyword = q.get("keywordSearch")
+        with self.lock:
+            self.hits.append((time.monotonic(), keyword))
+            pending = self.failures.get(keyword)
+            status = pending.pop(0) if pending else None
+        if status == 429:
+            return self._send(429, b"rate limited", {"Retry-After": "0.2"})
+        if status is not None:
+            return self._send(status, b"unavailable")
+
+        size = int(q.get("resultsPerPage", 10))
+        start = int(q.get("startIndex", 0))
+        total = 3 if keyword else TOTAL_RESULTS
+        vulns = [{"cve": {"id": f"CVE-2024-{i:05d}"}} for i in range(start, min(start + size, total))]
+        body = json.dumps({"totalResults": total, "startIndex": start, "vulnerabilities": vulns}).encode()
+        self._send(200, body, {"Content-Type": "application/json"})
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockNVD)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/rest/json/cves/2.0"
+
+
+def make_client(url, **kwargs):
+    options = dict(base_url=url, quota=100, period=1.0, slack=0, backoff_base=0.01, max_retries=3)
+    options.update(kwargs)
+    return NVDClient(**options)
+
+
+def reset(failures=None):
+    with MockNVD.lock:
+        MockNVD.hits.clear()
+        MockNVD.failures.clear()
+        MockNVD.failures.update(failures or {})
+
+
+def test_retries_429_with_retry_after():
+    server, url = start_server()
+    client = make_client(url)
+    try:
+        reset({"flaky": [429]})
+        t0 = time.monotonic()
+        items = client.search("flaky", 5)
+        assert len(items) == 3
+        assert time.monotonic() - t0 >= 0.2, "Retry-After was not honored"
+        assert client.stats()["retries"] == 1
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_retries_503():
+    server, url = start_server()
+    client = make_client(url)
+    try:
+        reset({"flaky": [503, 503]})
+        assert len(client.search("flaky", 5)) == 3
+        stats = client.stats()
+        assert stats["retries"] == 2 and stats["failures"] == 0, stats
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_gives_up_after_max_retries():
+    server, url = start_server()
+    client = make_client(url, max_retries=2)
+    try:
+        reset({"down": [503, 503, 503, 503]})
+        try:
+            client.search("down", 5)
+        except NVDError as e:
+            assert e.status == 503
+            assert client.stats()["requests"] == 3
+            return
+        raise AssertionError("no NVDError after the retries ran out")
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_pages_complete_and_ordered():
+    server, url = start_server()
+    client = make_client(url, max_workers=4)
+    try:
+        reset()
+        pages = list(client.iter_pages({}, page_size=10))
+        ids = [v["cve"]["id"] for page in pages for v in page["vulnerabilities"]]
+        assert len(pages) == 5
+        assert ids == [f"CVE-2024-{i:05d}" for i in range(TOTAL_RESULTS)]
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_rate_limit_window():
+    server, url = start_server()
+    client = make_client(url, max_workers=8, quota=5, period=1.0, slack=0.02)
+    try:
+        reset()
+        client.map(lambda i: client.search(f"k{i}", 1), range(12))
+        times = sorted(t for t, _ in MockNVD.hits)
+        worst = max(sum(1 for t in times if start <= t < start + 1.0) for start in times)
+        assert worst <= 5, f"{worst} requests in one 1s window"
+    finally:
+        client.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"  ✓ {name}")
+            except Exception as e:
+                failed += 1
+                print(f"  ✗ {name}: {e!r}")
+    sys.exit(1 if failed else 0)
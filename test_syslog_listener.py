@@ -0,0 +1,112 @@
+"""
+Socket-level checks for parser_engine.syslog_listener (no MongoDB needed).
+
+Starts a listener on free localhost ports with an in-memory sink and
+sends real UDP datagrams and TCP streams in both RFC6587 framings.
+
+    python test_syslog_listener.py
+"""
+
+import socket
+import sys
+import time
+
+from parser_engine.syslog_listener import start_in_thread
+
+RFC3164 = b"<34>Oct 11 22:14:15 gw01 sshd[4721]: Failed password for root from 10.0.0.5 port 2222 ssh2"
+RFC5424 = b"<165>1 2024-05-01T10:00:00Z web01 nginx 900 - - GET /index.html 200"
+
+
+class MemorySink:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, pairs, make_id):
+        self.messages.extend(raw.strip() for raw, _ in pairs)
+        return {"inserted": len(pairs)}
+
+
+def free_port(kind):
+    # Port 0 disables an input in the listener, so pick real free ports
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(sink):
+    return start_in_thread(host="127.0.0.1", udp_port=free_port(socket.SOCK_DGRAM),
+                           tcp_port=free_port(socket.SOCK_STREAM), flush_seconds=0.05, sink=sink)
+
+
+def wait_for(sink, n, timeout=5.0):
+    deadline = time.time() + timeout
+    while len(sink.messages) < n and time.time() < deadline:
+        time.sleep(0.02)
+    return sink.messages
+
+
+def send_tcp(port, payload):
+    with socket.create_connection(("127.0.0.1", port)) as s:
+        s.sendall(payload)
+
+
+def test_udp():
+    sink = MemorySink()
+    listener = start(sink)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(RFC3164, ("127.0.0.1", listener.udp_port))
+            s.sendto(RFC5424, ("127.0.0.1", listener.udp_port))
+        assert sorted(wait_for(sink, 2)) == sorted([RFC3164, RFC5424])
+    finally:
+        listener.stop_threadsafe()
+
+
+def test_tcp_lf_framing():
+    sink = MemorySink()
+    listener = start(sink)
+    # No PRI and a leading digit: must not be taken for an octet count
+    iso = b"2024-05-01T10:00:00Z host01 app: started"
+    try:
+        send_tcp(listener.tcp_port, RFC3164 + b"\n" + iso + b"\n12345\n" + RFC5424)
+        assert wait_for(sink, 4) == [RFC3164, iso, b"12345", RFC5424]
+    finally:
+        listener.stop_threadsafe()
+
+
+def test_tcp_octet_counting():
+    sink = MemorySink()
+    listener = start(sink)
+    try:
+        frames = b"".join(b"%d %s" % (len(m), m) for m in (RFC3164, RFC5424))
+        send_tcp(listener.tcp_port, frames)
+        assert wait_for(sink, 2) == [RFC3164, RFC5424]
+    finally:
+        listener.stop_threadsafe()
+
+
+def test_bind_failure_is_raised():
+    sink = MemorySink()
+    listener = start(sink)
+    try:
+        try:
+            start_in_thread(host="127.0.0.1", udp_port=free_port(socket.SOCK_DGRAM),
+                            tcp_port=listener.tcp_port, sink=sink)
+        except OSError:
+            return
+        raise AssertionError("second listener on a busy port did not raise")
+    finally:
+        listener.stop_threadsafe()
+
+
+if __name__ == "__main__":
+    failed = 0
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"  ✓ {name}")
+            except Exception as e:
+                failed += 1
+                print(f"  ✗ {name}: {e!r}")
+    sys.exit(1 if failed else 0)